@@ -3,17 +3,59 @@ Streamlit Web Application for PDF Notes Generator
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
+import re
 import sys
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import html
 from pathlib import Path
+import shutil
 import tempfile
+import io
 import json
 from datetime import datetime
 
-# Add modules to path
-sys.path.append(str(Path(__file__).parent))
+# PDF export is optional; the download tab explains how to enable it
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
 
-from modules.notes_generator import NotesGenerator
+# orjson serializes the JSON export in Rust; falls back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Add modules to path (scripts re-execute on every rerun, so only once)
+APP_DIR = str(Path(__file__).parent)
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# Ollama model tags for the two quality modes. Ollama's default tags are
+# 4-bit (Q4_K_M) builds; a smaller quantization such as
+# llama3.2:3b-instruct-q3_K_M trades some quality for faster decoding
+FAST_LLM_MODEL = os.getenv('OLLAMA_FAST_MODEL', "llama3.2:3b")
+QUALITY_LLM_MODEL = os.getenv('OLLAMA_QUALITY_MODEL', "llama3.1:8b")
+
+# Generated notes are cached in memory only, for an hour: they are derived
+# from uploaded documents, so they aren't written to disk or kept indefinitely
+NOTES_CACHE_TTL = 3600
+
+# st.fragment (Streamlit >= 1.37) reruns only the decorated block on widget
+# interaction; older releases fall back to running it as a plain function
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
 
 # Page config
 st.set_page_config(
@@ -27,7 +69,16 @@ st.set_page_config(
 )
 
 # Clean Stripe-Inspired Premium CSS
-st.markdown("""
+@st.cache_resource
+def _css() -> str:
+    """Global stylesheet, minified once per server process and shared across sessions"""
+    css = re.sub(r'/\*.*?\*/', '', RAW_CSS, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};])\s*', r'\1', css)
+    return css.strip()
+
+
+RAW_CSS = """
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap');
     
@@ -420,20 +471,307 @@ st.markdown("""
     .premium-card:nth-child(3) { animation-delay: 0.15s; }
     .premium-card:nth-child(4) { animation-delay: 0.2s; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+def inject_css():
+    """Emit the cached global stylesheet.
+
+    Streamlit drops any element not re-emitted on a rerun, so the <style>
+    block has to be sent every run; only building the string is cached.
+    """
+    st.markdown(_css(), unsafe_allow_html=True)
+
+
+# Uploads up to this size are processed from memory without a temp file
+IN_MEMORY_PDF_LIMIT = 10 * 1024 * 1024
+
+# HTML templates for repeated result items, filled with str.format
+PROGRESS_TEMPLATE = """
+            <div style='
+                text-align: center; 
+                padding: 1rem;
+                background: rgba(99, 91, 255, 0.1);
+                border-radius: 12px;
+                border: 1px solid rgba(99, 91, 255, 0.2);
+                margin: 1rem 0;
+            '>
+                <p style='
+                    font-size: 1rem;
+                    color: #635BFF;
+                    margin: 0;
+                    font-weight: 500;
+                '>
+                    {message}
+                </p>
+            </div>
+            """
+
+STAT_BOX_TEMPLATE = (
+    '<div class="stat-box">'
+    '<div class="stat-number">{value}</div>'
+    '<div class="stat-label">{label}</div>'
+    '</div>'
+)
+
+KEY_POINT_TEMPLATE = """
+            <div class='stripe-card' style='margin: 1rem 0; padding: 1.5rem; border-left: 3px solid var(--accent-purple);'>
+                <div style='display: flex; gap: 1rem;'>
+                    <div style='font-size: 1.2rem; font-weight: 700; color: var(--accent-purple); min-width: 2rem;'>{i}</div>
+                    <div style='color: var(--text-primary); line-height: 1.6;'>{point}</div>
+                </div>
+            </div>
+            """
+
+QA_CARD_TEMPLATE = """
+            <div class='stripe-card' style='margin: 1.5rem 0;'>
+                <div style='margin-bottom: 1rem;'>
+                    <span style='background: var(--accent-gradient); color: white; padding: 0.3rem 0.8rem; border-radius: 6px; font-weight: 600; font-size: 0.85rem;'>Q{i}</span>
+                </div>
+                <h3 style='margin: 0 0 1rem 0; font-size: 1.2rem; color: var(--text-primary);'>{question}</h3>
+                <div style='background: var(--bg-tertiary); padding: 1.2rem; border-radius: 10px; border-left: 3px solid var(--success-color);'>
+                    <div style='color: var(--success-color); font-weight: 600; font-size: 0.9rem; margin-bottom: 0.5rem;'>ANSWER</div>
+                    <p style='color: var(--text-secondary); margin: 0; line-height: 1.6;'>{answer}</p>
+                </div>
+            </div>
+            """
+
+
+@st.cache_resource
+def get_output_dir() -> str:
+    """Create the output directory once per server process"""
+    os.makedirs("output", exist_ok=True)
+    return "output"
+
+
+@st.cache_resource
+def _get_generator_cls():
+    """Import NotesGenerator on first use so the NLP stack loads lazily"""
+    from modules.notes_generator import NotesGenerator
+    return NotesGenerator
+
+
+def get_generator(use_llm: bool, llm_model: str, progress_callback):
+    """
+    Reuse this session's generator for the selected mode and model
+
+    Generators are kept per session rather than in st.cache_resource because
+    they hold the last run's results and a session-bound progress callback.
+    """
+    generators = st.session_state.setdefault('generators', {})
+    key = (use_llm, llm_model if use_llm else None)
+    generator = generators.get(key)
+    
+    if generator is None:
+        NotesGenerator = _get_generator_cls()
+        generator = NotesGenerator(use_llm=use_llm, progress_callback=progress_callback)
+        if use_llm and hasattr(generator, 'llm_summarizer'):
+            generator.llm_summarizer.model = llm_model
+        # The LLM check runs later via verify_llm(), which retries after a failure
+        generators[key] = generator
+    
+    generator.progress_callback = progress_callback
+    return generator
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    This session's background worker that runs note generation off the script thread
+
+    Kept per session rather than in st.cache_resource so one session's run
+    never queues behind another's; the idle thread exits once the session
+    state holding the executor is dropped.
+    """
+    executor = st.session_state.get('executor')
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notes-generator")
+        st.session_state.executor = executor
+    return executor
+
+
+def _run_with_script_ctx(ctx, func, *args):
+    """Run func in a worker thread attached to the calling script's context"""
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return func(*args)
+
+
+@st.cache_data(show_spinner=False, ttl=NOTES_CACHE_TTL, max_entries=16)
+def _generate_notes_cached(pdf_digest: str, use_llm: bool, llm_model: str,
+                           _generator, _pdf_source, _output_dir: str):
+    """
+    Run the pipeline once per (PDF content, mode, model)
+
+    Arguments with a leading underscore are not hashed by Streamlit, so the
+    PDF source (upload or temp file path) and generator don't defeat the cache.
+    """
+    return _generator.generate_notes(_pdf_source, output_dir=_output_dir)
+
+
+def _generate_notes_for_mode(pdf_digest: str, llm_model: str, generator,
+                             pdf_source, output_dir: str):
+    """
+    Settle the generator's mode, then run the cached pipeline for it
+
+    The LLM check is a network round trip, so it runs here on the worker
+    thread rather than blocking the script thread.
+
+    Returns:
+        Tuple of (results, effective use_llm after any LLM fallback)
+    """
+    use_llm = generator.verify_llm()
+    results = _generate_notes_cached(pdf_digest, use_llm, llm_model,
+                                     generator, pdf_source, output_dir)
+    return results, use_llm
+
+
+def build_results_html(results: dict) -> dict:
+    """
+    Render the escaped HTML for repeated result items once per generation
+
+    Kept outside ``results`` so the JSON export stays unchanged.
+    """
+    metadata = results['metadata']
+    stats = [
+        (metadata["page_count"], "Pages"),
+        (metadata.get("points_extracted", "N/A"), "Points Extracted"),
+        (metadata["word_count"], "Words"),
+        (len(results["keywords"]), "Keywords"),
+        (len(results["qa_pairs"]), "Questions"),
+    ]
+    
+    return {
+        # One grid emit instead of five column containers
+        'stats': (
+            "<div style='display: grid; grid-template-columns: repeat(5, 1fr); gap: 1rem;'>"
+            + "".join(STAT_BOX_TEMPLATE.format(value=html.escape(str(value)), label=label)
+                      for value, label in stats)
+            + "</div>"
+        ),
+        'keywords': (
+            "<div style='display: flex; flex-wrap: wrap; gap: 0.6rem; margin-top: 0.5rem;'>"
+            + "".join(f'<span class="keyword-badge">{html.escape(kw["term"])}</span>'
+                      for kw in results['keywords'])
+            + "</div>"
+        ),
+        'summary_sentences': "".join(
+            f"<div style='padding: 0.8rem; margin: 0.5rem 0; background: var(--bg-tertiary); border-radius: 8px; border-left: 3px solid var(--accent-purple);'>{i}. {html.escape(sent)}</div>"
+            for i, sent in enumerate(results['summary']['sentences'], 1)
+        ),
+        'key_points': "".join(
+            KEY_POINT_TEMPLATE.format(i=i, point=html.escape(point))
+            for i, point in enumerate(results['key_points'], 1)
+        ),
+        'qa': "".join(
+            QA_CARD_TEMPLATE.format(i=i, question=html.escape(qa['question']), answer=html.escape(qa['answer']))
+            for i, qa in enumerate(results['qa_pairs'], 1)
+        ),
+    }
+
+
+def get_results_html() -> dict:
+    """Pre-rendered HTML for the current results, built on first display"""
+    if st.session_state.get('results_html') is None:
+        st.session_state.results_html = build_results_html(st.session_state.results)
+    return st.session_state.results_html
+
+
+# Source lines per PDF paragraph; fewer, larger flowables keep the reportlab
+# story small for long notes
+PDF_LINES_PER_PARAGRAPH = 20
+
+# Markdown heading/emphasis markers dropped from PDF lines in one pass
+PDF_STRIP_MARKERS = str.maketrans('', '', '#*')
+
+
+@st.cache_resource
+def _pdf_styles():
+    """Title and body paragraph styles, built once per process"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
+                                 fontSize=20, spaceAfter=30, alignment=1)
+    # spaceAfter replaces a Spacer flowable after every paragraph
+    body_style = ParagraphStyle('NotesBody', parent=styles['Normal'], spaceAfter=0.05 * inch)
+    return title_style, body_style
+
+
+def build_notes_pdf(content: str) -> bytes:
+    """
+    Render organized notes content to PDF bytes
+
+    Args:
+        content: Markdown-ish notes text
+
+    Returns:
+        PDF file contents
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18)
+    title_style, body_style = _pdf_styles()
+
+    story = [Paragraph("Study Notes", title_style), Spacer(1, 0.2 * inch)]
+
+    # Paragraph parses its text as markup, so lines are escaped before joining
+    lines = [html.escape(line.translate(PDF_STRIP_MARKERS), quote=False)
+             for line in content.split('\n') if line.strip()]
+    story.extend(
+        Paragraph('<br/>'.join(lines[start:start + PDF_LINES_PER_PARAGRAPH]), body_style)
+        for start in range(0, len(lines), PDF_LINES_PER_PARAGRAPH)
+    )
+
+    doc.build(story)
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    return pdf_data
+
+
+# Download payloads are keyed by results_key (PDF digest, mode and model);
+# the results and generator are passed with a leading underscore so
+# Streamlit doesn't hash the whole notes payload on every rerun
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_pdf_bytes(results_key: str, _results: dict) -> bytes:
+    """PDF export of the organized notes"""
+    return build_notes_pdf(_results.get('organized_content', ''))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_json(results_key: str, _results: dict):
+    """JSON export of the full results (UTF-8 bytes with orjson, else str)"""
+    if ORJSON_AVAILABLE:
+        # Accept non-str keys and numpy values, which json.dumps tolerates
+        # (it stringifies keys; numpy floats subclass float)
+        return orjson.dumps(_results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                            | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_results, indent=2, ensure_ascii=False)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_txt(results_key: str, _generator) -> str:
+    """Plain text export from the generator's current results"""
+    return _generator._format_notes_text()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_md(results_key: str, _generator) -> str:
+    """Markdown export from the generator's current results"""
+    return _generator._format_notes_markdown()
+
+
+SESSION_DEFAULTS = (
+    ('notes_generated', False),
+    ('results', None),
+    ('results_html', None),
+    ('results_key', None),
+    ('generator', None),
+    ('use_llm', True),
+    ('llm_model', FAST_LLM_MODEL),
+)
+
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'notes_generated' not in st.session_state:
-        st.session_state.notes_generated = False
-    if 'results' not in st.session_state:
-        st.session_state.results = None
-    if 'generator' not in st.session_state:
-        st.session_state.generator = None
-    if 'use_llm' not in st.session_state:
-        st.session_state.use_llm = True
-    if 'llm_model' not in st.session_state:
-        st.session_state.llm_model = "llama3.2:3b"
+    for key, default in SESSION_DEFAULTS:
+        st.session_state.setdefault(key, default)
 
 def display_header():
     """Display premium Stripe-style header"""
@@ -473,41 +811,7 @@ def display_header():
     </div>
     """, unsafe_allow_html=True)
 
-def display_sidebar():
-    """Display clean Stripe-style sidebar"""
-    with st.sidebar:
-        st.markdown("""
-        <div style='padding: 0 0 2rem 0;'>
-            <h2 style='margin: 0; font-size: 1.5rem;'>⚙️ Configuration</h2>
-            <p style='color: #A0A8B8; font-size: 0.9rem; margin-top: 0.5rem;'>
-                Customize your AI processing settings
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("<div class='premium-card'>", unsafe_allow_html=True)
-        
-        # LLM Mode selector
-        use_llm = st.checkbox("🚀 Enable AI Mode", value=True, 
-                             help="Uses advanced LLM for best quality. Disable for faster traditional processing.")
-        
-        if use_llm:
-            st.markdown("<div style='margin-top: 1rem; padding: 1rem; background: rgba(99, 91, 255, 0.1); border-radius: 12px; border: 1px solid rgba(99, 91, 255, 0.2);'>", unsafe_allow_html=True)
-            quality_mode = st.radio(
-                "Model Selection:",
-                ["⚡ Fast (3B) — ~20s/page", "🎯 Quality (8B) — ~45s/page"],
-                index=0,
-                help="Choose between speed and maximum quality"
-            )
-            st.markdown("</div>", unsafe_allow_html=True)
-            st.session_state.llm_model = "llama3.2:3b" if "Fast" in quality_mode else "llama3.1:8b"
-        else:
-            st.session_state.llm_model = None
-        
-        st.session_state.use_llm = use_llm
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        st.markdown("""
+SIDEBAR_STATIC_HTML = """
         <div class='premium-card' style='margin-top: 1.5rem;'>
             <h3 style='margin: 0 0 1rem 0; font-size: 1.1rem;'>📊 Features</h3>
             <div style='display: flex; flex-direction: column; gap: 0.8rem;'>
@@ -533,9 +837,7 @@ def display_sidebar():
                 </div>
             </div>
         </div>
-        """, unsafe_allow_html=True)
         
-        st.markdown("""
         <div class='stripe-card' style='margin-top: 1.5rem;'>
             <h3 style='margin: 0 0 1rem 0; font-size: 1.1rem;'>🚀 Quick Start</h3>
             <ol style='padding-left: 1.2rem; margin: 0; color: var(--text-secondary); font-size: 0.9rem;'>
@@ -545,15 +847,59 @@ def display_sidebar():
                 <li>Download in your preferred format</li>
             </ol>
         </div>
-        """, unsafe_allow_html=True)
         
-        st.markdown("""
         <div style='margin-top: 2rem; padding-top: 2rem; border-top: 1px solid var(--border-color); text-align: center;'>
             <p style='font-size: 0.85rem; color: var(--text-muted); margin: 0;'>
                 Built with ❤️ using Python & AI
             </p>
         </div>
+        """
+
+
+def display_sidebar():
+    """Display clean Stripe-style sidebar"""
+    with st.sidebar:
+        st.markdown("""
+        <div style='padding: 0 0 2rem 0;'>
+            <h2 style='margin: 0; font-size: 1.5rem;'>⚙️ Configuration</h2>
+            <p style='color: #A0A8B8; font-size: 0.9rem; margin-top: 0.5rem;'>
+                Customize your AI processing settings
+            </p>
+        </div>
         """, unsafe_allow_html=True)
+        
+        display_ai_settings()
+        st.checkbox("🐞 Show error details", key='debug',
+                    help="Include the full traceback when processing fails")
+        
+        # Features, Quick Start and footer never change: one emit
+        st.markdown(SIDEBAR_STATIC_HTML, unsafe_allow_html=True)
+
+
+@fragment
+def display_ai_settings():
+    """AI mode controls; reruns on its own when the checkbox or radio changes"""
+    st.markdown("<div class='premium-card'>", unsafe_allow_html=True)
+    
+    # LLM Mode selector
+    use_llm = st.checkbox("🚀 Enable AI Mode", value=True, 
+                         help="Uses advanced LLM for best quality. Disable for faster traditional processing.")
+    
+    if use_llm:
+        st.markdown("<div style='margin-top: 1rem; padding: 1rem; background: rgba(99, 91, 255, 0.1); border-radius: 12px; border: 1px solid rgba(99, 91, 255, 0.2);'>", unsafe_allow_html=True)
+        quality_mode = st.radio(
+            "Model Selection:",
+            ["⚡ Fast (3B) — ~20s/page", "🎯 Quality (8B) — ~45s/page"],
+            index=0,
+            help="Choose between speed and maximum quality"
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+        st.session_state.llm_model = FAST_LLM_MODEL if "Fast" in quality_mode else QUALITY_LLM_MODEL
+    else:
+        st.session_state.llm_model = None
+    
+    st.session_state.use_llm = use_llm
+    st.markdown("</div>", unsafe_allow_html=True)
 
 
 def upload_section():
@@ -590,18 +936,27 @@ def upload_section():
 def process_pdf(uploaded_file):
     """Process PDF and generate notes with live progress"""
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
+        # Content hash keys the results cache independent of the upload's name
+        pdf_digest = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
         
-        # Create output directory
-        output_dir = Path("output")
-        output_dir.mkdir(exist_ok=True)
+        # Small uploads are read straight from memory; larger ones are
+        # spilled to a temp file so pdfplumber can page through them on disk
+        uploaded_file.seek(0)
+        tmp_path = None
+        if uploaded_file.size <= IN_MEMORY_PDF_LIMIT:
+            pdf_source = uploaded_file
+        else:
+            # Copy in page-sized chunks to avoid a second in-memory copy of the PDF
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', buffering=0) as tmp_file:
+                shutil.copyfileobj(uploaded_file, tmp_file, length=4096)
+                tmp_path = tmp_file.name
+            pdf_source = tmp_path
+        
+        output_dir = get_output_dir()
         
         # Initialize generator with current settings
         use_llm = st.session_state.get('use_llm', True)
-        llm_model = st.session_state.get('llm_model', 'llama3.2:3b')
+        llm_model = st.session_state.get('llm_model', FAST_LLM_MODEL)
         
         # Progress container
         st.markdown("""
@@ -617,49 +972,53 @@ def process_pdf(uploaded_file):
         # Progress callback function
         def progress_callback(message):
             """Update progress in real-time"""
-            status_container.markdown(f"""
-            <div style='
-                text-align: center; 
-                padding: 1rem;
-                background: rgba(99, 91, 255, 0.1);
-                border-radius: 12px;
-                border: 1px solid rgba(99, 91, 255, 0.2);
-                margin: 1rem 0;
-            '>
-                <p style='
-                    font-size: 1rem;
-                    color: #635BFF;
-                    margin: 0;
-                    font-weight: 500;
-                '>
-                    {message}
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
+            status_container.markdown(PROGRESS_TEMPLATE.format(message=message), unsafe_allow_html=True)
         
         if use_llm:
             status_container.info(f"🤖 Using AI Mode: {llm_model}")
-            st.session_state.generator = NotesGenerator(use_llm=True, progress_callback=progress_callback)
-            if hasattr(st.session_state.generator, 'llm_summarizer'):
-                st.session_state.generator.llm_summarizer.model = llm_model
         else:
             status_container.info("⚡ Using Traditional Mode (Lightning Fast)")
-            st.session_state.generator = NotesGenerator(use_llm=False, progress_callback=progress_callback)
+        # The worker thread only queues messages; the script thread renders them
+        progress_messages = queue.Queue()
+        st.session_state.generator = get_generator(use_llm, llm_model, progress_messages.put)
         
         progress_bar.progress(10)
         progress_callback("📄 Extracting Text from PDF...")
         
         progress_bar.progress(20)
         
-        results = st.session_state.generator.generate_notes(
-            tmp_path,
-            output_dir=str(output_dir)
+        future = get_executor().submit(
+            _run_with_script_ctx,
+            get_script_run_ctx(),
+            _generate_notes_for_mode,
+            pdf_digest,
+            llm_model,
+            st.session_state.generator,
+            pdf_source,
+            output_dir
         )
+        while True:
+            done = future.done()
+            # Render only the newest message per poll so bursts of page
+            # updates cost one frontend delta instead of one each
+            latest = None
+            while not progress_messages.empty():
+                latest = progress_messages.get_nowait()
+            if latest is not None:
+                progress_callback(latest)
+            if done:
+                break
+            time.sleep(0.1)
+        results, effective_llm = future.result()
+        # Cache hits skip generate_notes, so keep the generator's formatters in sync
+        st.session_state.generator.results = results
+        results_key = f"{pdf_digest}:{effective_llm}:{llm_model}"
         
         progress_bar.progress(90)
         
         # Clean up
-        os.unlink(tmp_path)
+        if tmp_path:
+            os.unlink(tmp_path)
         
         progress_callback("✅ Generation Complete!")
         progress_bar.progress(100)
@@ -669,24 +1028,25 @@ def process_pdf(uploaded_file):
         
         # Update session state
         st.session_state.results = results
+        st.session_state.results_html = None
+        st.session_state.results_key = results_key
         st.session_state.notes_generated = True
         
         return True
         
     except Exception as e:
-        st.error(f"❌ Error processing PDF: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
+        st.error(f"❌ Error processing PDF: {type(e).__name__}: {e}")
+        if st.session_state.get('debug'):
+            st.error(traceback.format_exc())
         return False
 
 
+@fragment
 def display_statistics():
     """Display document statistics"""
     if not st.session_state.results:
         return
     
-    metadata = st.session_state.results['metadata']
-    
     st.markdown("""
     <div style='text-align: center; margin: 3rem 0 2rem 0;'>
         <h2 style='font-size: 2.5rem; margin: 0;'>📊 Document Analysis</h2>
@@ -694,62 +1054,19 @@ def display_statistics():
     </div>
     """, unsafe_allow_html=True)
     
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.markdown(
-            f'<div class="stat-box">'
-            f'<div class="stat-number">{metadata["page_count"]}</div>'
-            f'<div class="stat-label">Pages</div>'
-            f'</div>',
-            unsafe_allow_html=True
-        )
-    
-    with col2:
-        st.markdown(
-            f'<div class="stat-box">'
-            f'<div class="stat-number">{metadata.get("points_extracted", "N/A")}</div>'
-            f'<div class="stat-label">Points Extracted</div>'
-            f'</div>',
-            unsafe_allow_html=True
-        )
-    
-    with col3:
-        st.markdown(
-            f'<div class="stat-box">'
-            f'<div class="stat-number">{metadata["word_count"]}</div>'
-            f'<div class="stat-label">Words</div>'
-            f'</div>',
-            unsafe_allow_html=True
-        )
-    
-    with col4:
-        st.markdown(
-            f'<div class="stat-box">'
-            f'<div class="stat-number">{len(st.session_state.results["keywords"])}</div>'
-            f'<div class="stat-label">Keywords</div>'
-            f'</div>',
-            unsafe_allow_html=True
-        )
-    
-    with col5:
-        st.markdown(
-            f'<div class="stat-box">'
-            f'<div class="stat-number">{len(st.session_state.results["qa_pairs"])}</div>'
-            f'<div class="stat-label">Questions</div>'
-            f'</div>',
-            unsafe_allow_html=True
-        )
+    st.markdown(get_results_html()['stats'], unsafe_allow_html=True)
     
     st.markdown("---")
 
 
+@fragment
 def display_results():
     """Display results in tabs"""
     if not st.session_state.results:
         return
     
     results = st.session_state.results
+    results_html = get_results_html()
     
     # Create tabs (removed Mindmap)
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -794,8 +1111,7 @@ def display_results():
         
         if results['summary']['sentences']:
             with st.expander("View Source Sentences"):
-                for i, sent in enumerate(results['summary']['sentences'], 1):
-                    st.markdown(f"<div style='padding: 0.8rem; margin: 0.5rem 0; background: var(--bg-tertiary); border-radius: 8px; border-left: 3px solid var(--accent-purple);'>{i}. {sent}</div>", unsafe_allow_html=True)
+                st.markdown(results_html['summary_sentences'], unsafe_allow_html=True)
     
     # Tab 3: Key Points
     with tab3:
@@ -804,15 +1120,7 @@ def display_results():
         st.markdown("<p style='color: var(--text-muted);'>Most important takeaways from the document</p>", unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
         
-        for i, point in enumerate(results['key_points'], 1):
-            st.markdown(f"""
-            <div class='stripe-card' style='margin: 1rem 0; padding: 1.5rem; border-left: 3px solid var(--accent-purple);'>
-                <div style='display: flex; gap: 1rem;'>
-                    <div style='font-size: 1.2rem; font-weight: 700; color: var(--accent-purple); min-width: 2rem;'>{i}</div>
-                    <div style='color: var(--text-primary); line-height: 1.6;'>{point}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(results_html['key_points'], unsafe_allow_html=True)
     
     # Tab 4: Keywords
     with tab4:
@@ -823,11 +1131,7 @@ def display_results():
         
         # Display as badges
         st.markdown("<div class='stripe-card' style='margin-top: 1.5rem;'>", unsafe_allow_html=True)
-        keywords_html = "<div style='display: flex; flex-wrap: wrap; gap: 0.6rem; margin-top: 0.5rem;'>"
-        for kw in results['keywords']:
-            keywords_html += f'<span class="keyword-badge">{kw["term"]}</span>'
-        keywords_html += "</div>"
-        st.markdown(keywords_html, unsafe_allow_html=True)
+        st.markdown(results_html['keywords'], unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Display with scores
@@ -848,22 +1152,11 @@ def display_results():
         st.info(f"{len(results['qa_pairs'])} questions to test your understanding")
         st.markdown("</div>", unsafe_allow_html=True)
         
-        for i, qa in enumerate(results['qa_pairs'], 1):
-            st.markdown(f"""
-            <div class='stripe-card' style='margin: 1.5rem 0;'>
-                <div style='margin-bottom: 1rem;'>
-                    <span style='background: var(--accent-gradient); color: white; padding: 0.3rem 0.8rem; border-radius: 6px; font-weight: 600; font-size: 0.85rem;'>Q{i}</span>
-                </div>
-                <h3 style='margin: 0 0 1rem 0; font-size: 1.2rem; color: var(--text-primary);'>{qa['question']}</h3>
-                <div style='background: var(--bg-tertiary); padding: 1.2rem; border-radius: 10px; border-left: 3px solid var(--success-color);'>
-                    <div style='color: var(--success-color); font-weight: 600; font-size: 0.9rem; margin-bottom: 0.5rem;'>ANSWER</div>
-                    <p style='color: var(--text-secondary); margin: 0; line-height: 1.6;'>{qa['answer']}</p>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(results_html['qa'], unsafe_allow_html=True)
     
     # Tab 6: Download
     with tab6:
+        results_key = st.session_state.results_key
         st.markdown("""
         <div class='stripe-card' style='text-align: center;'>
             <h2 style='margin: 0 0 0.5rem 0;'>Export Your Notes</h2>
@@ -874,46 +1167,22 @@ def display_results():
         # PDF Export
         st.markdown("<div class='stripe-card' style='margin-top: 1.5rem;'>", unsafe_allow_html=True)
         st.markdown("<h3 style='margin: 0 0 1rem 0;'>📄 PDF Format</h3>", unsafe_allow_html=True)
-        try:
-            from reportlab.lib.pagesizes import letter
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            import io
-            
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72,
-                                  topMargin=72, bottomMargin=18)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Add content
-            title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
-                                        fontSize=20, spaceAfter=30, alignment=1)
-            story.append(Paragraph(f"Study Notes", title_style))
-            story.append(Spacer(1, 0.2*inch))
-            
-            content = results.get('organized_content', '')
-            for line in content.split('\\n'):
-                if line.strip():
-                    clean_line = line.replace('#', '').replace('**', '').replace('*', '')
-                    story.append(Paragraph(clean_line, styles['Normal']))
-                    story.append(Spacer(1, 0.05*inch))
-            
-            doc.build(story)
-            pdf_data = buffer.getvalue()
-            buffer.close()
-            
-            st.download_button(
-                label="📥 Download PDF",
-                data=pdf_data,
-                file_name=f"notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                mime="application/pdf",
-                use_container_width=True,
-                type="primary"
-            )
-        except Exception as e:
-            st.error(f"PDF generation error: {e}")
+        if not REPORTLAB_AVAILABLE:
+            st.info("PDF export needs reportlab. Install with: pip install reportlab")
+        else:
+            try:
+                pdf_data = _build_pdf_bytes(results_key, results)
+                
+                st.download_button(
+                    label="📥 Download PDF",
+                    data=pdf_data,
+                    file_name=f"notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    mime="application/pdf",
+                    use_container_width=True,
+                    type="primary"
+                )
+            except Exception as e:
+                st.error(f"PDF generation error: {e}")
         
         st.markdown("</div>", unsafe_allow_html=True)
         
@@ -923,10 +1192,10 @@ def display_results():
         
         # JSON download
         with col1:
-            json_str = json.dumps(results, indent=2, ensure_ascii=False)
+            json_data = _build_json(results_key, results)
             st.download_button(
                 label="📄 Download JSON",
-                data=json_str,
+                data=json_data,
                 file_name=f"notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json",
                 use_container_width=True
@@ -934,7 +1203,7 @@ def display_results():
         
         # Text download
         with col2:
-            text_notes = st.session_state.generator._format_notes_text()
+            text_notes = _build_txt(results_key, st.session_state.generator)
             st.download_button(
                 label="📝 Download TXT",
                 data=text_notes,
@@ -945,7 +1214,7 @@ def display_results():
         
         # Markdown download
         with col3:
-            md_notes = st.session_state.generator._format_notes_markdown()
+            md_notes = _build_md(results_key, st.session_state.generator)
             st.download_button(
                 label="📋 Download Markdown",
                 data=md_notes,
@@ -959,6 +1228,7 @@ def display_results():
 
 def main():
     """Main application"""
+    inject_css()
     initialize_session_state()
     display_header()
     display_sidebar()
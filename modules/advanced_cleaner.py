@@ -3,22 +3,160 @@ Advanced PDF Text Cleaner
 Handles badly formatted PDFs with concatenated words, missing spaces, etc.
 """
 
+import os
 import re
-from typing import List
+from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
 import logging
+from .process_pool import POOL_CONTEXT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import RE2 for linear-time matching of the page scrubbing patterns
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+def _compile_linear(pattern: str):
+    """
+    Compile with RE2 when installed, falling back to stdlib re
+
+    Only used for patterns whose meaning is the same in both engines (no
+    lookarounds and no reliance on Unicode \\w); flags must be inline.
+    """
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile(pattern)
+        except Exception as e:
+            logger.debug(f"RE2 rejected {pattern!r}, using re: {e}")
+    return re.compile(pattern)
+
+
+# Page scrubbing patterns: each one runs over the whole page text
+URL_PATTERN = _compile_linear(r'https?://[^\s]+')
+WWW_PATTERN = _compile_linear(r'www\.[^\s]+')
+IMAGE_SOURCE_PATTERN = _compile_linear(r'(?i)Image\s*(?:Source|Courtesy)\s*:.*')
+TABLE_MARKER_PATTERN = _compile_linear(r'(?i)Table\s*:.*')
+COURTESY_PATTERN = _compile_linear(r'(?i)Courtesy\s*:.*')
+REFERENCE_MARKER_PATTERN = _compile_linear(r'\[\d+\]')
+
+# OCR fixes for words broken up by stray spaces, as (group name, pattern,
+# rewrite). They are matched in one pass and dispatched on the group name.
+# The suffix rules share one "\b\w+\s+" stem prefix so each word start is
+# scanned once instead of once per rule; a greedy \w+ followed by \s can
+# only end at the end of the word, so this matches what separate
+# alternatives would.
+OCR_SUFFIX_RULES = [
+    ('ing', r'(?P<ing_mid>in|at|on|ed|er|ly|en)\s+g',
+     lambda m: m.group('ocr_stem') + m.group('ing_mid') + 'g'),
+    ('ation', r'at\s+ion', lambda m: m.group('ocr_stem') + 'ation'),
+    ('ons', r'on\s+s', lambda m: m.group('ocr_stem') + 'ons'),
+]
+OCR_SPLIT_RULES = [
+    ('con', r'\bc\s+on\s+', lambda m: 'con'),
+    ('inform', r'\bin\s+for\s+m', lambda m: 'inform'),
+    ('tor', r'\bto\s+(?:r|s|w)\b', lambda m: 'tor'),
+]
+OCR_SPLIT_PATTERN = re.compile(
+    r'\b(?P<ocr_stem>\w+)\s+(?:'
+    + '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in OCR_SUFFIX_RULES)
+    + r')\b|'
+    + '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in OCR_SPLIT_RULES)
+)
+_OCR_REWRITES = {name: rewrite for name, _, rewrite in OCR_SUFFIX_RULES + OCR_SPLIT_RULES}
+
+
+def _fix_ocr_split(match: re.Match) -> str:
+    """Rewrite one OCR split match using the rule that matched"""
+    return _OCR_REWRITES[match.lastgroup](match)
+
+
+# Zero-width positions between lowercase/capital, lowercase/digit and digit/letter
+CASE_DIGIT_BOUNDARY = re.compile(r'(?<=[a-z])(?=[A-Z]|\d)|(?<=\d)(?=[a-zA-Z])')
+
+# Prepositions glued between two words: "foodofthe" -> "food of the". Applied
+# one preposition at a time, in this order: each pass sees the spaces the
+# previous ones inserted, which a single alternation would not
+COMMON_PREPS = ['of', 'to', 'in', 'on', 'at', 'by', 'for', 'from', 'with', 'the', 'and']
+CONCATENATED_PREPS = tuple(re.compile(rf'([a-z])({prep})([a-z])', re.IGNORECASE)
+                           for prep in COMMON_PREPS)
+
+def _squash_whitespace(text: str) -> str:
+    """
+    Same result as re.sub(r'\\s+', ' ', text)
+
+    str.split() finds the whitespace runs in C; runs at either end are
+    kept as a single space, as the regex would.
+    """
+    words = text.split()
+    if not words:
+        return ' ' if text else ''
+    squashed = ' '.join(words)
+    if text[0].isspace():
+        squashed = ' ' + squashed
+    if text[-1].isspace():
+        squashed += ' '
+    return squashed
+
+# Sentence filter: ASCII sentences are measured with str.translate deletion
+# tables (counting happens in C); the tables are derived from the regex
+# classes so both paths agree. Non-ASCII sentences use the Unicode regexes.
+SENTENCE_END = re.compile(r'[.!?]+')
+DIGIT_CHAR = re.compile(r'\d')
+SPECIAL_CHAR = re.compile(r'[^\w\s]')
+_ASCII_CHARS = [chr(i) for i in range(128)]
+_DELETE_DIGITS = str.maketrans('', '', ''.join(c for c in _ASCII_CHARS if DIGIT_CHAR.match(c)))
+_DELETE_WORD_SPACE = str.maketrans('', '', ''.join(c for c in _ASCII_CHARS if not SPECIAL_CHAR.match(c)))
+_DELETE_VOWELS = str.maketrans('', '', 'aeiouAEIOU')
+
+
+def _count_digits(text: str) -> int:
+    """Number of characters matching \\d"""
+    if text.isascii():
+        return len(text) - len(text.translate(_DELETE_DIGITS))
+    return len(DIGIT_CHAR.findall(text))
+
+
+def _count_special(text: str) -> int:
+    """Number of characters matching [^\\w\\s]"""
+    if text.isascii():
+        return len(text.translate(_DELETE_WORD_SPACE))
+    return len(SPECIAL_CHAR.findall(text))
+
+
+# Line filters used by is_content_line
+NUMERIC_LINE = re.compile(r'^[\d\s.,\-/]+$')
+ASCII_LETTER = re.compile(r'[a-zA-Z]')
+NOISE_LINE = re.compile(
+    r'^\s*\d+\s*$'               # Just page numbers
+    r'|^(?:Page|Chapter)\s+\d+'   # Page/Chapter headers
+    r'|Image\s*(?:Source|Courtesy)'
+    r'|^Table\s*:'
+    r'|^Figure\s*:',
+    re.IGNORECASE
+)
+
+COMMON_WORDS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'with', 'from', 'this', 'that',
+    'data', 'analysis', 'design', 'system', 'using', 'based', 'method', 'result'
+])
+
+# Below this many pages the cost of starting worker processes outweighs the
+# gain: cleaning takes about 1-1.5 ms a page, while starting a pool of four
+# forkserver workers took 0.2-0.45 s, a break-even of a few hundred pages
+PARALLEL_MIN_PAGES = 500
+MAX_CLEANING_WORKERS = 8
+
 
 class AdvancedTextCleaner:
     """Clean and normalize badly extracted PDF text"""
     
     def __init__(self):
-        self.common_words = set([
-            'the', 'and', 'for', 'are', 'but', 'not', 'with', 'from', 'this', 'that',
-            'data', 'analysis', 'design', 'system', 'using', 'based', 'method', 'result'
-        ])
+        self.common_words = COMMON_WORDS
     
     def clean_concatenated_text(self, text: str) -> str:
         """
@@ -30,44 +168,19 @@ class AdvancedTextCleaner:
         
         # Fix common OCR errors with spaces in words
         # "in g" -> "ing", "at ion" -> "ation", etc.
-        text = re.sub(r'\b(\w+)\s+(in|at|on|ed|er|ly|en)\s+g\b', r'\1\2g', text)
-        text = re.sub(r'\b(\w+)\s+at\s+ion\b', r'\1ation', text)
-        text = re.sub(r'\b(\w+)\s+on\s+s\b', r'\1ons', text)
-        text = re.sub(r'\bc\s+on\s+', r'con', text)
-        text = re.sub(r'\bin\s+for\s+m', r'inform', text)
-        text = re.sub(r'\bto\s+(r|s|w)\b', r'tor', text)
-        
-        # Step 1: Add space before capital letters in middle of lowercase
-        # "dataVisualization" -> "data Visualization"
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+        text = OCR_SPLIT_PATTERN.sub(_fix_ocr_split, text)
         
-        # Step 2: Add space between lowercase and number
-        # "page1" -> "page 1"
-        text = re.sub(r'([a-z])(\d)', r'\1 \2', text)
+        # Add space at lowercase/capital, lowercase/digit and digit/letter boundaries
+        # "dataVisualization" -> "data Visualization", "page1" -> "page 1", "1page" -> "1 page"
+        text = CASE_DIGIT_BOUNDARY.sub(' ', text)
         
-        # Step 3: Add space between number and letter
-        # "1page" -> "1 page"
-        text = re.sub(r'(\d)([a-zA-Z])', r'\1 \2', text)
-        
-        # Step 4: Fix common concatenations - ENHANCED
-        text = re.sub(r'([a-z])([A-Z][a-z])', r'\1 \2', text)
-        
-        # Step 5: Fix common prepositions concatenated with words
+        # Fix common prepositions concatenated with words
         # "offood" -> "of food", "tothe" -> "to the", "bythe" -> "by the"
-        common_preps = ['of', 'to', 'in', 'on', 'at', 'by', 'for', 'from', 'with', 'the', 'and']
-        for prep in common_preps:
-            # Fix word+preposition+word: "foodofthe" -> "food of the"
-            pattern = rf'([a-z])({prep})([a-z])'
-            text = re.sub(pattern, rf'\1 \2 \3', text, flags=re.IGNORECASE)
-        
-        # Step 6: Add period between sentences if missing
-        # "end Next" -> "end. Next"
-        text = re.sub(r'([a-z])([A-Z][a-z]{2,})', r'\1. \2', text)
+        for pattern in CONCATENATED_PREPS:
+            text = pattern.sub(r'\1 \2 \3', text)
         
-        # Step 7: Clean up multiple spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text
+        # Clean up multiple spaces
+        text = _squash_whitespace(text)
         
         return text
     
@@ -77,11 +190,9 @@ class AdvancedTextCleaner:
         # Clean the text first
         text = self.clean_concatenated_text(text)
         
-        # Split by common sentence endings
-        sentences = re.split(r'[.!?]+', text)
-        
         meaningful = []
-        for sent in sentences:
+        # Split by common sentence endings
+        for sent in SENTENCE_END.split(text):
             sent = sent.strip()
             
             # Skip if too short (reduced from 30 to 15)
@@ -89,23 +200,23 @@ class AdvancedTextCleaner:
                 continue
             
             # Skip if mostly numbers (increased threshold to be less strict)
-            if len(re.findall(r'\d', sent)) / max(len(sent), 1) > 0.6:
+            if _count_digits(sent) / max(len(sent), 1) > 0.6:
                 continue
             
             # Skip if mostly special characters (increased threshold)
-            if len(re.findall(r'[^\w\s]', sent)) / max(len(sent), 1) > 0.5:
+            if _count_special(sent) / max(len(sent), 1) > 0.5:
                 continue
             
-            # Must have at least 3 words (reduced from 4)
-            words = sent.split()
-            if len(words) < 3:
+            # Must have at least 3 words (reduced from 4); whitespace is
+            # already squashed to single spaces and the ends stripped
+            if sent.count(' ') < 2:
                 continue
             
             # Skip if no vowels (likely garbled)
-            if not re.search(r'[aeiouAEIOU]', sent):
+            if len(sent.translate(_DELETE_VOWELS)) == len(sent):
                 continue
             
-            meaningful.append(sent.strip())
+            meaningful.append(sent)
         
         return meaningful
     
@@ -116,18 +227,18 @@ class AdvancedTextCleaner:
             return ""
         
         # Remove URLs
-        text = re.sub(r'https?://[^\s]+', '', text)
-        text = re.sub(r'www\.[^\s]+', '', text)
+        text = URL_PATTERN.sub('', text)
+        text = WWW_PATTERN.sub('', text)
         
         # Remove image sources
-        text = re.sub(r'Image\s*(?:Source|Courtesy)\s*:.*', '', text, flags=re.IGNORECASE)
+        text = IMAGE_SOURCE_PATTERN.sub('', text)
         
         # Remove table markers
-        text = re.sub(r'Table\s*:.*', '', text, flags=re.IGNORECASE)
+        text = TABLE_MARKER_PATTERN.sub('', text)
         
         # Remove references
-        text = re.sub(r'Courtesy\s*:.*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\[\d+\]', '', text)
+        text = COURTESY_PATTERN.sub('', text)
+        text = REFERENCE_MARKER_PATTERN.sub('', text)
         
         # Fix concatenated text
         cleaned_text = self.clean_concatenated_text(text)
@@ -147,6 +258,31 @@ class AdvancedTextCleaner:
         
         return '\n'.join(sentences)
     
+    def clean_pages_parallel(self, pages: List[str], num_workers: Optional[int] = None) -> List[str]:
+        """
+        Run clean_page_content over many pages using a process pool
+        
+        Args:
+            pages: Raw text of each page
+            num_workers: Number of worker processes (defaults to CPU count, capped at 8)
+            
+        Returns:
+            Cleaned text of each page, in the same order
+        """
+        if num_workers is None:
+            num_workers = min(os.cpu_count() or 1, MAX_CLEANING_WORKERS)
+        
+        if num_workers <= 1 or len(pages) < PARALLEL_MIN_PAGES:
+            return [self.clean_page_content(page) for page in pages]
+        
+        chunksize = max(1, len(pages) // (num_workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=POOL_CONTEXT) as executor:
+                return list(executor.map(self.clean_page_content, pages, chunksize=chunksize))
+        except Exception as e:
+            logger.warning(f"Parallel cleaning failed, cleaning pages sequentially: {e}")
+            return [self.clean_page_content(page) for page in pages]
+    
     def is_content_line(self, line: str) -> bool:
         """Check if a line contains actual content"""
         
@@ -157,29 +293,20 @@ class AdvancedTextCleaner:
             return False
         
         # Just numbers and special chars
-        if re.match(r'^[\d\s.,\-/]+$', line):
+        if NUMERIC_LINE.match(line):
             return False
         
         # Mostly special characters (increased threshold to be less strict)
-        if len(re.findall(r'[^\w\s]', line)) / max(len(line), 1) > 0.7:
+        if _count_special(line) / max(len(line), 1) > 0.7:
             return False
         
         # No letters at all
-        if not re.search(r'[a-zA-Z]', line):
+        if not ASCII_LETTER.search(line):
             return False
         
         # Skip common noise patterns
-        noise_patterns = [
-            r'^\s*\d+\s*$',  # Just page numbers
-            r'^(Page|Chapter)\s+\d+',  # Page/Chapter headers
-            r'Image\s*(Source|Courtesy)',
-            r'^Table\s*:',
-            r'^Figure\s*:',
-        ]
-        
-        for pattern in noise_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                return False
+        if NOISE_LINE.search(line):
+            return False
         
         return True
 
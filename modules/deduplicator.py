@@ -4,50 +4,213 @@ Removes duplicate and near-duplicate content using semantic similarity
 """
 
 import re
-from typing import List, Set, Tuple
+import math
+import functools
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Set, Tuple
 from difflib import SequenceMatcher
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import datasketch for MinHash LSH candidate lookup
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    logger.warning("datasketch not installed. use_lsh will fall back to exact matching. Install with: pip install datasketch")
+    DATASKETCH_AVAILABLE = False
+
+# Try to import rapidfuzz for C++ similarity scoring
+try:
+    import numpy as np
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    logger.warning("rapidfuzz not installed. Similarity scoring will use difflib. Install with: pip install rapidfuzz")
+    RAPIDFUZZ_AVAILABLE = False
+
+# Try to import pyahocorasick for multi-pattern substring matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    logger.warning("pyahocorasick not installed. Substring removal will use pairwise checks. Install with: pip install pyahocorasick")
+    AHOCORASICK_AVAILABLE = False
+
+# MinHash settings: character shingles track SequenceMatcher's character-level
+# ratio much better than word shingles on short sentences. The LSH threshold
+# is deliberately looser than similarity_threshold because LSH only proposes
+# candidates; calculate_similarity still makes the final call. LSH is still
+# approximate (a pair with a high ratio but little shingle overlap is never
+# proposed), so it is opt-in (use_lsh). deduplicate_list only uses it without
+# rapidfuzz, for lists of LSH_MIN_TEXTS or more: the exact cdist scan is
+# faster at every size measured (about 6k texts: 3.3 s vs 3.7 s), while the
+# difflib scan already takes about 0.9 s at 400 texts (LSH: 0.15 s)
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+LSH_THRESHOLD_MARGIN = 0.3
+LSH_MIN_TEXTS = 500
+
+# Similarity methods for deduplicate_list: 'sequence' is the character
+# sequence ratio (rapidfuzz or difflib); 'shingle' is Jaccard similarity of
+# 3-character shingle sets, cheaper per pair but stricter at the same threshold
+SIMILARITY_METHODS = ('sequence', 'shingle')
+
+# Novelty check: with no 3-character shingle in common, two texts can only
+# match in runs of at most two characters, each run separated from the next
+# by an unmatched character, which caps both scorers' ratio at
+# 0.8 + 0.8/(len1+len2). Above that bound a text sharing no shingle with
+# anything seen so far needs no similarity comparison at all.
+NOVELTY_SHINGLE_SIZE = 3
+NOVELTY_RATIO_CAP = 0.8
+
+# Texts scored per rapidfuzz cdist call when deduplicating a list without LSH
+CDIST_BATCH_SIZE = 512
+
+# Normalization: punctuation other than periods is dropped, then filler words
+# that don't affect meaning are removed
+NON_WORD_PATTERN = re.compile(r'[^\w\s.]')
+# ASCII text skips the regex: a deletion table built from the same class
+_DELETE_NON_WORD = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(128)) if NON_WORD_PATTERN.match(c)))
+FILLER_WORDS = frozenset(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for'])
+
+
+@functools.lru_cache(maxsize=None)
+def _lsh_params(threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) datasketch chooses for an LSH threshold
+    
+    Choosing them integrates the false positive/negative curves numerically
+    (tens of milliseconds), so it runs once per threshold rather than per index.
+    """
+    lsh = MinHashLSH(threshold=threshold, num_perm=NUM_PERM)
+    return lsh.b, lsh.r
+
 
 class ContentDeduplicator:
     """Remove duplicate and similar content"""
     
-    def __init__(self, similarity_threshold: float = 0.85):
+    def __init__(self, similarity_threshold: float = 0.85, method: str = 'sequence',
+                 use_lsh: bool = False):
         """
         Args:
             similarity_threshold: Ratio above which sentences are considered duplicates (0-1)
+            method: 'sequence' (default) or 'shingle' similarity for deduplicate_list
+            use_lsh: Find candidates with MinHash LSH (needs datasketch) in
+                is_duplicate, and in deduplicate_list for lists of at least
+                LSH_MIN_TEXTS texts when rapidfuzz is missing; faster than
+                difflib on large inputs but may keep some near-duplicates
+                the exact scan would drop
         """
+        if method not in SIMILARITY_METHODS:
+            raise ValueError(f"Unknown similarity method: {method}")
         self.similarity_threshold = similarity_threshold
-        self.seen_content = set()
+        self.method = method
+        self.use_lsh = use_lsh and DATASKETCH_AVAILABLE
+        self.lsh_threshold = max(similarity_threshold - LSH_THRESHOLD_MARGIN, 0.1)
+        # Maps each accepted text to its normalized form so it is normalized once
+        self.seen_content: Dict[str, str] = {}
+        self.seen_shingles: Set[str] = set()
+        self.seen_lsh = self._new_lsh() if self.use_lsh else None
+        # Guards the check-then-insert on the seen_* state in is_duplicate
+        self._lock = threading.Lock()
+    
+    def _new_lsh(self):
+        """Create an empty LSH index"""
+        return MinHashLSH(num_perm=NUM_PERM, params=_lsh_params(self.lsh_threshold))
+    
+    def _minhash(self, normalized: str):
+        """MinHash signature over character shingles of normalized text"""
+        shingles = {normalized[i:i + SHINGLE_SIZE].encode('utf-8')
+                    for i in range(max(len(normalized) - SHINGLE_SIZE + 1, 1))}
+        minhash = MinHash(num_perm=NUM_PERM)
+        minhash.update_batch(shingles)
+        return minhash
+    
+    def _char_shingles(self, normalized: str) -> Set[str]:
+        """3-character shingles of normalized text"""
+        return {normalized[i:i + NOVELTY_SHINGLE_SIZE]
+                for i in range(len(normalized) - NOVELTY_SHINGLE_SIZE + 1)}
+    
+    def _is_novel(self, normalized: str, shingles: Set[str]) -> bool:
+        """True when no seen text can reach the similarity threshold"""
+        if len(normalized) * (self.similarity_threshold - NOVELTY_RATIO_CAP) <= NOVELTY_RATIO_CAP:
+            return False
+        return shingles.isdisjoint(self.seen_shingles)
+    
+    def calculate_shingle_similarity(self, text1: str, text2: str) -> float:
+        """Jaccard similarity of the two texts' 3-character shingle sets"""
+        shingles1 = self._char_shingles(self._normalize_text(text1))
+        shingles2 = self._char_shingles(self._normalize_text(text2))
+        union = len(shingles1 | shingles2)
+        return len(shingles1 & shingles2) / union if union else 0.0
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts using sequence matching"""
-        # Normalize texts for comparison
         norm1 = self._normalize_text(text1)
         norm2 = self._normalize_text(text2)
         
+        if RAPIDFUZZ_AVAILABLE:
+            return fuzz.ratio(norm1, norm2) / 100.0
         return SequenceMatcher(None, norm1, norm2).ratio()
     
+    def _has_similar(self, normalized: str, candidates: List[str]) -> bool:
+        """Check whether any already-normalized candidate meets the similarity threshold"""
+        if RAPIDFUZZ_AVAILABLE:
+            match = process.extractOne(normalized, candidates, scorer=fuzz.ratio,
+                                       processor=None, score_cutoff=self.similarity_threshold * 100)
+            return match is not None
+        return any(self._is_similar(normalized, candidate) for candidate in candidates)
+    
+    def _is_similar(self, norm1: str, norm2: str) -> bool:
+        """
+        Check two already-normalized texts against the similarity threshold
+        using difflib
+        
+        The ratio is 2*matches/(len1+len2), so 2*min(len)/(len1+len2) bounds it
+        from above and rejects pairs of very different length without matching.
+        """
+        total = len(norm1) + len(norm2)
+        if not total:
+            return True
+        if 2 * min(len(norm1), len(norm2)) / total < self.similarity_threshold:
+            return False
+        
+        matcher = SequenceMatcher(None, norm1, norm2)
+        if matcher.quick_ratio() < self.similarity_threshold:
+            return False
+        return matcher.ratio() >= self.similarity_threshold
+    
+    def _length_band(self, length: int) -> Tuple[int, int]:
+        """
+        Range of normalized lengths that can reach the similarity threshold
+        against a text of the given length
+        
+        Both scorers are bounded by 2*min(len)/(len1+len2), so a match needs
+        t/(2-t) <= len_other/length <= (2-t)/t. Rounded outward so float error
+        never excludes a true match.
+        """
+        t = self.similarity_threshold
+        if t <= 0:
+            return 0, math.inf
+        return math.floor(length * t / (2 - t)), math.ceil(length * (2 - t) / t)
+    
     def _normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
-        # Convert to lowercase
+        # Lowercase and remove punctuation except periods; split() also
+        # collapses whitespace
         text = text.lower()
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove punctuation except periods
-        text = re.sub(r'[^\w\s.]', '', text)
+        if text.isascii():
+            words = text.translate(_DELETE_NON_WORD).split()
+        else:
+            words = NON_WORD_PATTERN.sub('', text).split()
         
         # Remove common filler words that don't affect meaning
-        fillers = ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for']
-        words = text.split()
-        words = [w for w in words if w not in fillers]
-        
-        return ' '.join(words)
+        return ' '.join(w for w in words if w not in FILLER_WORDS)
     
     def is_duplicate(self, text: str, reference_texts: List[str] = None) -> bool:
         """
@@ -63,33 +226,75 @@ class ContentDeduplicator:
         if not text or len(text.strip()) < 10:
             return True
         
-        # Check against reference texts or seen content
-        comparison_set = reference_texts if reference_texts is not None else self.seen_content
+        with self._lock:
+            return self._check_and_add(text, reference_texts)
+    
+    def _check_and_add(self, text: str, reference_texts: List[str] = None) -> bool:
+        """Body of is_duplicate; callers hold self._lock"""
+        normalized = self._normalize_text(text)
         
-        for seen in comparison_set:
-            similarity = self.calculate_similarity(text, seen)
-            if similarity >= self.similarity_threshold:
-                logger.debug(f"Found duplicate (similarity: {similarity:.2f}): {text[:50]}...")
+        # Check against reference texts or seen content; the LSH index only
+        # covers seen content, so explicit references are scanned pairwise
+        minhash = None
+        shingles = self._char_shingles(normalized)
+        if reference_texts is not None:
+            comparison_set = [self._normalize_text(ref) for ref in reference_texts]
+        else:
+            if text in self.seen_content:
                 return True
+            if self._is_novel(normalized, shingles):
+                comparison_set = []
+            elif self.seen_lsh is not None:
+                minhash = self._minhash(normalized)
+                comparison_set = [self.seen_content[seen] for seen in self.seen_lsh.query(minhash)]
+            else:
+                comparison_set = list(self.seen_content.values())
+        
+        if comparison_set and self._has_similar(normalized, comparison_set):
+            logger.debug(f"Found duplicate: {text[:50]}...")
+            return True
         
         # Add to seen content
-        self.seen_content.add(text)
+        self.seen_content[text] = normalized
+        self.seen_shingles.update(shingles)
+        if self.seen_lsh is not None:
+            if minhash is None:
+                minhash = self._minhash(normalized)
+            if text not in self.seen_lsh:
+                self.seen_lsh.insert(text, minhash)
         return False
     
-    def deduplicate_list(self, texts: List[str]) -> List[str]:
+    def deduplicate_list(self, texts: List[str], limit: Optional[int] = None) -> List[str]:
         """
         Remove duplicates from a list of texts
         
         Args:
             texts: List of text strings
+            limit: Stop once this many unique texts are kept (the result is
+                the first `limit` items of the full deduplicated list)
             
         Returns:
             Deduplicated list
         """
+        if self.method == 'shingle':
+            unique_texts = self._deduplicate_list_shingle(texts, limit)
+            logger.info(f"Deduplicated: {len(texts)} -> {len(unique_texts)} items")
+            return unique_texts
+        
+        if RAPIDFUZZ_AVAILABLE:
+            unique_texts = self._deduplicate_list_cdist(texts, limit)
+            logger.info(f"Deduplicated: {len(texts)} -> {len(unique_texts)} items")
+            return unique_texts
+        
         unique_texts = []
+        unique_normalized = []
         seen_normalized = set()
+        by_length = []  # sorted (normalized length, index) pairs
+        lsh = self._new_lsh() if self.use_lsh and len(texts) >= LSH_MIN_TEXTS else None
         
         for text in texts:
+            if limit is not None and len(unique_texts) >= limit:
+                break
             if not text or len(text.strip()) < 10:
                 continue
             
@@ -100,20 +305,109 @@ class ContentDeduplicator:
             if normalized in seen_normalized:
                 continue
             
-            # Check semantic similarity (slower)
+            # Check semantic similarity (slower); only accepted texts whose
+            # length is within the band that can still reach the threshold
+            # are compared, and with LSH only those sharing a bucket
+            low, high = self._length_band(len(normalized))
+            if lsh is not None:
+                minhash = self._minhash(normalized)
+                candidates = [unique_normalized[i] for i in lsh.query(minhash)
+                              if low <= len(unique_normalized[i]) <= high]
+            else:
+                start = bisect_left(by_length, (low, -1))
+                end = bisect_right(by_length, (high, math.inf))
+                candidates = [unique_normalized[i] for _, i in by_length[start:end]]
+            
+            is_dup = bool(candidates) and self._has_similar(normalized, candidates)
+            
+            if not is_dup:
+                if lsh is not None:
+                    lsh.insert(len(unique_texts), minhash)
+                insort(by_length, (len(normalized), len(unique_texts)))
+                unique_texts.append(text)
+                unique_normalized.append(normalized)
+                seen_normalized.add(normalized)
+        
+        logger.info(f"Deduplicated: {len(texts)} -> {len(unique_texts)} items")
+        return unique_texts
+    
+    def _deduplicate_list_shingle(self, texts: List[str], limit: Optional[int] = None) -> List[str]:
+        """
+        deduplicate_list using shingle Jaccard similarity
+        
+        Shingle sets are built once per text; Jaccard can't exceed the ratio
+        of the smaller set size to the larger, which rejects most pairs before
+        any set intersection.
+        """
+        unique_texts = []
+        unique_shingles = []
+        
+        for text in texts:
+            if limit is not None and len(unique_texts) >= limit:
+                break
+            if not text or len(text.strip()) < 10:
+                continue
+            
+            shingles = self._char_shingles(self._normalize_text(text))
+            size = len(shingles)
+            
             is_dup = False
-            for unique_text in unique_texts:
-                if self.calculate_similarity(text, unique_text) >= self.similarity_threshold:
+            for other in unique_shingles:
+                other_size = len(other)
+                largest = max(size, other_size)
+                # Empty sets score 0.0, as in calculate_shingle_similarity
+                if largest and min(size, other_size) / largest < self.similarity_threshold:
+                    continue
+                common = len(shingles & other)
+                union = size + other_size - common
+                if (common / union if union else 0.0) >= self.similarity_threshold:
                     is_dup = True
                     break
             
             if not is_dup:
                 unique_texts.append(text)
-                seen_normalized.add(normalized)
+                unique_shingles.append(shingles)
         
-        logger.info(f"Deduplicated: {len(texts)} -> {len(unique_texts)} items")
         return unique_texts
     
+    def _deduplicate_list_cdist(self, texts: List[str], limit: Optional[int] = None) -> List[str]:
+        """
+        deduplicate_list scored in batches with rapidfuzz cdist
+        
+        Each batch is scored against the accepted texts and against itself in
+        two multi-threaded C calls; the accept/reject pass over the batch then
+        only reads the matrices, so results match the sequential scan.
+        """
+        cutoff = self.similarity_threshold * 100
+        texts = [text for text in texts if text and len(text.strip()) >= 10]
+        unique_texts = []
+        unique_normalized = []
+        
+        for start in range(0, len(texts), CDIST_BATCH_SIZE):
+            if limit is not None and len(unique_texts) >= limit:
+                break
+            batch = texts[start:start + CDIST_BATCH_SIZE]
+            batch_normalized = [self._normalize_text(text) for text in batch]
+            
+            if unique_normalized:
+                scores = process.cdist(batch_normalized, unique_normalized, scorer=fuzz.ratio,
+                                       processor=None, score_cutoff=cutoff, dtype=np.float64, workers=-1)
+                matches_unique = (scores >= cutoff).any(axis=1)
+            else:
+                matches_unique = np.zeros(len(batch), dtype=bool)
+            matches_batch = process.cdist(batch_normalized, batch_normalized, scorer=fuzz.ratio,
+                                          processor=None, score_cutoff=cutoff, dtype=np.float64, workers=-1) >= cutoff
+            
+            accepted = []
+            for i in range(len(batch)):
+                if not matches_unique[i] and not matches_batch[i, accepted].any():
+                    accepted.append(i)
+            
+            unique_texts.extend(batch[i] for i in accepted)
+            unique_normalized.extend(batch_normalized[i] for i in accepted)
+        
+        return unique_texts if limit is None else unique_texts[:limit]
+    
     def deduplicate_by_page(self, pages_data: List[dict]) -> List[dict]:
         """
         Remove duplicate content from page-wise data
@@ -149,21 +443,57 @@ class ContentDeduplicator:
         
         # Sort by length (longest first)
         sorted_texts = sorted(texts, key=len, reverse=True)
+        lowered = [text.lower() for text in sorted_texts]
+        
+        if AHOCORASICK_AVAILABLE:
+            return self._remove_substrings_automaton(sorted_texts, lowered)
         
         unique_texts = []
-        for text in sorted_texts:
+        unique_lowered = []
+        for text, text_lower in zip(sorted_texts, lowered):
             # Check if this text is a substring of any text already added
-            is_substring = False
-            for unique_text in unique_texts:
-                if text.lower() in unique_text.lower():
-                    is_substring = True
-                    break
-            
-            if not is_substring:
+            if not any(text_lower in unique_lower for unique_lower in unique_lowered):
                 unique_texts.append(text)
+                unique_lowered.append(text_lower)
         
         return unique_texts
     
+    def _remove_substrings_automaton(self, sorted_texts: List[str], lowered: List[str]) -> List[str]:
+        """
+        Aho-Corasick version of remove_substrings
+        
+        A text contained in a dropped text is also contained in whichever kept
+        text dropped it, so a text is dropped exactly when it occurs inside an
+        earlier (longer or equal) text. One automaton over all texts finds every
+        such occurrence in a single sweep per text.
+        """
+        positions = {}
+        for i, text_lower in enumerate(lowered):
+            positions.setdefault(text_lower, []).append(i)
+        
+        automaton = ahocorasick.Automaton()
+        for text_lower in positions:
+            if text_lower:
+                automaton.add_word(text_lower, text_lower)
+        automaton.make_automaton()
+        
+        dropped = set()
+        for i, text_lower in enumerate(lowered):
+            if i in dropped:
+                continue
+            if not text_lower:
+                # The empty string is contained in any earlier text
+                if i > 0:
+                    dropped.add(i)
+                continue
+            for found in {key for _, key in automaton.iter(text_lower)}:
+                dropped.update(j for j in positions[found] if j > i)
+        
+        return [text for i, text in enumerate(sorted_texts) if i not in dropped]
+    
     def reset(self):
         """Reset seen content"""
-        self.seen_content = set()
+        with self._lock:
+            self.seen_content = {}
+            self.seen_shingles = set()
+            self.seen_lsh = self._new_lsh()
@@ -10,24 +10,12 @@ import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 import logging
 
+# spaCy model shared with the other modules (None when unavailable)
+from .spacy_model import nlp, SPACY_AVAILABLE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import spacy, but make it optional
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-    try:
-        nlp = spacy.load('en_core_web_sm')
-    except:
-        logger.warning("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
-        SPACY_AVAILABLE = False
-        nlp = None
-except ImportError:
-    logger.warning("spaCy not installed. Some features will be limited.")
-    SPACY_AVAILABLE = False
-    nlp = None
-
 # Try to import RAKE
 try:
     from rake_nltk import Rake
@@ -36,12 +24,50 @@ except ImportError:
     logger.warning("RAKE not installed. Install with: pip install rake-nltk")
     RAKE_AVAILABLE = False
 
+# Pipeline components noun chunks don't need (they use the parse and the
+# POS tags set by tagger + attribute_ruler)
+NOUN_CHUNK_UNUSED_PIPES = ('ner', 'lemmatizer')
+
+# Texts shorter than this (in words) are skipped by RAKE: too little text
+# for its phrase scores to mean anything, not worth the NLTK pass
+RAKE_MIN_WORDS = 100
+
+# Frequency-based keywords: lowercase words of 4+ letters, minus common words
+FREQUENCY_WORD = re.compile(r'\b[a-z]{4,}\b')
+FREQUENCY_STOPWORDS = frozenset({
+    'this', 'that', 'with', 'from', 'have', 'been', 'were',
+    'will', 'would', 'could', 'should', 'their', 'there',
+    'which', 'when', 'where', 'what', 'these', 'those'
+})
+
+# Technical terms: capitalized runs, hyphenated words, and words carrying
+# math/unit symbols. Kept as separate scans; their matches overlap
+TERM_SPECIAL_CHARS = '°²³±≈≠≤≥'
+CAPITALIZED_TERM = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+HYPHENATED_TERM = re.compile(r'\b\w+-\w+\b')
+SPECIAL_CHAR_TERM = re.compile(rf'\b\w+[{TERM_SPECIAL_CHARS}]\w*\b')
+
 
 class KeywordExtractor:
     """Extract keywords and key phrases from text"""
     
     def __init__(self):
         self.rake = Rake() if RAKE_AVAILABLE else None
+        # TF-IDF vectorizers keyed by max_features, reused across documents
+        self._tfidf_vectorizers = {}
+    
+    def _get_tfidf_vectorizer(self, max_features: int) -> TfidfVectorizer:
+        """Vectorizer for the given vocabulary size, created on first use"""
+        vectorizer = self._tfidf_vectorizers.get(max_features)
+        if vectorizer is None:
+            vectorizer = TfidfVectorizer(
+                max_features=max_features,
+                stop_words='english',
+                ngram_range=(1, 2),
+                dtype=np.float32
+            )
+            self._tfidf_vectorizers[max_features] = vectorizer
+        return vectorizer
         
     def extract_keywords(self, text: str, sentences: List[str], 
                         top_n: int = 15) -> Dict[str, any]:
@@ -90,21 +116,19 @@ class KeywordExtractor:
             if len(sentences) < 2:
                 return []
             
-            vectorizer = TfidfVectorizer(
-                max_features=top_n * 2,
-                stop_words='english',
-                ngram_range=(1, 2)
-            )
+            vectorizer = self._get_tfidf_vectorizer(top_n * 2)
             
             tfidf_matrix = vectorizer.fit_transform(sentences)
             feature_names = vectorizer.get_feature_names_out()
             
             # Get average TF-IDF scores
-            avg_scores = np.asarray(tfidf_matrix.mean(axis=0)).flatten()
+            avg_scores = tfidf_matrix.sum(axis=0).A1 / tfidf_matrix.shape[0]
             
-            # Sort by score
-            top_indices = avg_scores.argsort()[-top_n:][::-1]
-            keywords = [(feature_names[i], avg_scores[i]) for i in top_indices]
+            # Select the top scores, then sort only those
+            k = min(top_n, len(avg_scores))
+            top_indices = np.argpartition(avg_scores, -k)[-k:]
+            top_indices = top_indices[np.argsort(avg_scores[top_indices])[::-1]]
+            keywords = [(feature_names[i], float(avg_scores[i])) for i in top_indices]
             
             return keywords
         except Exception as e:
@@ -113,6 +137,11 @@ class KeywordExtractor:
     
     def _extract_rake_keywords(self, text: str, top_n: int) -> List[Tuple[str, float]]:
         """Extract keywords using RAKE algorithm"""
+        # Cheap length gate before the expensive pass; splitting stops as
+        # soon as enough words are found
+        if len(text.split(None, RAKE_MIN_WORDS - 1)) < RAKE_MIN_WORDS:
+            return []
+        
         try:
             self.rake.extract_keywords_from_text(text)
             keywords_scores = self.rake.get_ranked_phrases_with_scores()
@@ -124,7 +153,10 @@ class KeywordExtractor:
     def _extract_noun_phrases(self, text: str, top_n: int) -> List[str]:
         """Extract noun phrases using spaCy"""
         try:
-            doc = nlp(text[:1000000])  # Limit text length for spaCy
+            disabled = [name for name in NOUN_CHUNK_UNUSED_PIPES if name in nlp.pipe_names]
+            # Per-call disable: select_pipes would switch the pipes off on the
+            # shared model, under other threads' parses too
+            doc = nlp(text[:1000000], disable=disabled)  # Limit text length for spaCy
             
             # Extract noun chunks
             noun_chunks = [chunk.text.lower() for chunk in doc.noun_chunks 
@@ -140,18 +172,11 @@ class KeywordExtractor:
     
     def _extract_frequency_keywords(self, text: str, top_n: int) -> List[Tuple[str, int]]:
         """Extract keywords based on frequency"""
-        # Remove common words and extract meaningful terms
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-        
-        # Common stopwords
-        stopwords = {'this', 'that', 'with', 'from', 'have', 'been', 'were', 
-                    'will', 'would', 'could', 'should', 'their', 'there', 
-                    'which', 'when', 'where', 'what', 'these', 'those'}
-        
-        words = [w for w in words if w not in stopwords]
-        
-        # Count frequency
-        word_freq = Counter(words)
+        # Count every matched term in one C-level Counter pass, then drop the
+        # common words: a handful of key deletions instead of a per-word test
+        word_freq = Counter(FREQUENCY_WORD.findall(text.lower()))
+        for stopword in FREQUENCY_STOPWORDS:
+            word_freq.pop(stopword, None)
         
         return word_freq.most_common(top_n)
     
@@ -203,16 +228,16 @@ class KeywordExtractor:
         terms = set()
         
         # Capitalized terms (likely technical)
-        caps_terms = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
-        terms.update(caps_terms)
+        terms.update(CAPITALIZED_TERM.findall(text))
         
-        # Hyphenated terms
-        hyphenated = re.findall(r'\b\w+-\w+\b', text)
-        terms.update(hyphenated)
+        # Hyphenated and special-character terms need a literal character
+        # that a fast substring check can rule out before the regex scan
+        if '-' in text:
+            terms.update(HYPHENATED_TERM.findall(text))
         
         # Terms with special characters (equations, formulas)
-        special_terms = re.findall(r'\b\w+[°²³±≈≠≤≥]\w*\b', text)
-        terms.update(special_terms)
+        if any(char in text for char in TERM_SPECIAL_CHARS):
+            terms.update(SPECIAL_CHAR_TERM.findall(text))
         
         return list(terms)
 
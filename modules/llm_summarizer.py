@@ -4,14 +4,81 @@ Generates intelligent, abstractive summaries using local LLMs
 """
 
 import os
+import re
 import json
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import Callable, List, Dict, Optional, Tuple
 import requests
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import diskcache to keep LLM responses across runs
+try:
+    from diskcache import Cache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    logger.warning("diskcache not installed. LLM responses will only be cached per run. Install with: pip install diskcache")
+    DISKCACHE_AVAILABLE = False
+
+# Page prompts in flight at once; match the Ollama server's
+# OLLAMA_NUM_PARALLEL so requests overlap instead of queueing
+LLM_PAGE_WORKERS = int(os.getenv('OLLAMA_NUM_PARALLEL', '4'))
+
+# Groq's hosted API takes far more concurrent requests than a local server;
+# cap in-flight calls to stay inside its rate limits
+GROQ_PAGE_WORKERS = int(os.getenv('GROQ_MAX_INFLIGHT', '50'))
+
+# Page responses kept for reuse (least recently used evicted first)
+PAGE_CACHE_SIZE = 512
+
+# On-disk response cache shared by runs, e.g. LLM_CACHE_DIR=~/.cache/notes_llm,
+# so re-processing the same PDF skips the LLM calls. Off unless set, since the
+# responses are derived from uploaded documents; entries expire after a week
+LLM_CACHE_DIR = os.path.expanduser(os.getenv('LLM_CACHE_DIR', ''))
+LLM_CACHE_EXPIRE = 7 * 24 * 3600
+
+# Page text beyond this many characters is not sent to the LLM
+PAGE_PROMPT_CHARS = 2000
+
+# Pages sharing one extraction prompt (1 = one call per page), and how much
+# of each page such a grouped prompt includes
+LLM_PAGES_PER_PROMPT = int(os.getenv('LLM_PAGES_PER_PROMPT', '1'))
+GROUPED_PAGE_CHARS = 1500
+PAGE_MARKER = re.compile(r'^[ \t]*=+\s*PAGE\s+(\d+)\s*=+[ \t]*$', re.MULTILINE | re.IGNORECASE)
+
+# Sections of a page extraction response, and how their bullets are read
+RESPONSE_SECTIONS = ('DEFINITIONS:', 'CONCEPTS:', 'PROCEDURES:', 'IMPORTANT_POINTS:')
+BULLET_PREFIXES = ('-', '•', '*')
+BULLET_STRIP_CHARS = '-•*0123456789. '
+MAX_SECTION_ITEMS = 8
+
+# Keep the model loaded between calls of a run (Ollama unloads it after 5
+# minutes idle by default). The context size is the same on every call, as
+# changing it makes Ollama reload the model; 4096 fits grouped-page prompts
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+OLLAMA_NUM_CTX = 4096
+
+# A "Q...: question" or "A...: answer" line of a Q&A response (text after
+# the first colon)
+QA_LINE = re.compile(r'^\s*([QA])[^:\n]*:(.*)$', re.MULTILINE)
+
+# Items of extracted content the synthesis and Q&A prompts draw on, taken
+# in page order; once the finished leading pages hold this many, those
+# prompts are fully determined
+SYNTHESIS_DEFINITIONS = 8
+SYNTHESIS_CONCEPTS = 8
+SYNTHESIS_POINTS = 12
+QA_CONTENT_ITEMS = 20
+
+# Kept-alive connections to Ollama; at least one per concurrent page request
+OLLAMA_POOL_SIZE = max(16, LLM_PAGE_WORKERS)
+
 
 class LLMSummarizer:
     """Generate intelligent summaries using LLM (Ollama or Groq API)"""
@@ -21,13 +88,25 @@ class LLMSummarizer:
         Initialize LLM Summarizer
         
         Args:
-            model: Model name (llama3.2:3b for speed, llama3.1:8b for quality)
+            model: Model name (llama3.2:3b for speed, llama3.1:8b for quality;
+                Ollama's default tags are Q4_K_M quantized)
             use_groq: Use Groq API instead of local Ollama (for deployment)
         """
         self.model = model
         self.use_groq = use_groq or os.getenv('USE_GROQ_API', 'false').lower() == 'true'
         self.ollama_url = "http://localhost:11434/api/generate"
-        self.cache = {}  # Cache for repeated content
+        # Raw LLM responses keyed by a digest of the prompted page text, so
+        # identical pages are sent once whatever their page number
+        self.cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.disk_cache = self._open_disk_cache()
+        
+        # One pooled keep-alive session, so each call skips the TCP handshake
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=OLLAMA_POOL_SIZE,
+                                                pool_maxsize=OLLAMA_POOL_SIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
         
         if self.use_groq:
             try:
@@ -41,7 +120,30 @@ class LLMSummarizer:
         else:
             logger.info(f"Using local Ollama with model: {model}")
     
-    def generate(self, prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
+    def _open_disk_cache(self):
+        """On-disk response cache, or None when unavailable or disabled"""
+        if not (DISKCACHE_AVAILABLE and LLM_CACHE_DIR):
+            return None
+        try:
+            return Cache(LLM_CACHE_DIR)
+        except Exception as e:
+            logger.warning(f"LLM disk cache unavailable at {LLM_CACHE_DIR}: {e}")
+            return None
+    
+    def close(self):
+        """Close pooled Ollama connections and the disk cache"""
+        self.session.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def generate(self, prompt: str, max_tokens: int = 500, temperature: float = 0.3,
+                 on_token: Optional[Callable[[str], None]] = None) -> str:
         """
         Generate text using LLM
         
@@ -49,35 +151,57 @@ class LLMSummarizer:
             prompt: Input prompt
             max_tokens: Maximum tokens to generate
             temperature: Creativity (0-1, lower = more focused)
+            on_token: If given, the response is streamed and this is called
+                with each piece of text as it arrives (from the calling thread)
             
         Returns:
             Generated text
         """
         if self.use_groq:
-            return self._generate_groq(prompt, max_tokens, temperature)
+            return self._generate_groq(prompt, max_tokens, temperature, on_token)
         else:
-            return self._generate_ollama(prompt, max_tokens, temperature)
+            return self._generate_ollama(prompt, max_tokens, temperature, on_token)
     
-    def _generate_ollama(self, prompt: str, max_tokens: int, temperature: float) -> str:
+    def _generate_ollama(self, prompt: str, max_tokens: int, temperature: float,
+                         on_token: Optional[Callable[[str], None]] = None) -> str:
         """Generate using local Ollama"""
+        stream = on_token is not None
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.ollama_url,
                 json={
                     "model": self.model,
                     "prompt": prompt,
-                    "stream": False,
+                    "stream": stream,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
                     "options": {
                         "temperature": temperature,
-                        "num_predict": max_tokens
+                        "num_predict": max_tokens,
+                        "num_ctx": OLLAMA_NUM_CTX
                     }
                 },
-                timeout=120
+                timeout=120,
+                stream=stream
             )
             
             if response.status_code == 200:
-                result = response.json()
-                return result.get('response', '').strip()
+                if not stream:
+                    result = response.json()
+                    return result.get('response', '').strip()
+                
+                # Streamed: one JSON object per line, each with the next piece
+                pieces = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    piece = chunk.get('response', '')
+                    if piece:
+                        pieces.append(piece)
+                        on_token(piece)
+                    if chunk.get('done'):
+                        break
+                return ''.join(pieces).strip()
             else:
                 logger.error(f"Ollama API error: {response.status_code}")
                 return ""
@@ -89,16 +213,27 @@ class LLMSummarizer:
             logger.error(f"Error generating with Ollama: {str(e)}")
             return ""
     
-    def _generate_groq(self, prompt: str, max_tokens: int, temperature: float) -> str:
+    def _generate_groq(self, prompt: str, max_tokens: int, temperature: float,
+                       on_token: Optional[Callable[[str], None]] = None) -> str:
         """Generate using Groq API"""
         try:
             chat_completion = self.groq_client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
                 model=self.model,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                stream=on_token is not None
             )
-            return chat_completion.choices[0].message.content.strip()
+            if on_token is None:
+                return chat_completion.choices[0].message.content.strip()
+            
+            pieces = []
+            for chunk in chat_completion:
+                piece = chunk.choices[0].delta.content if chunk.choices else None
+                if piece:
+                    pieces.append(piece)
+                    on_token(piece)
+            return ''.join(pieces).strip()
         except Exception as e:
             logger.error(f"Error generating with Groq: {str(e)}")
             return ""
@@ -114,11 +249,63 @@ class LLMSummarizer:
         Returns:
             Dictionary with definitions, concepts, procedures, and points
         """
-        # Check cache first
-        cache_key = str(page_num) + page_text[:100]
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        # Parse per call: the result carries page_num and callers may mutate it
+        return self._parse_response(self._page_response(page_text[:PAGE_PROMPT_CHARS]), page_num)
+    
+    def _page_response(self, page_text: str) -> str:
+        """
+        Raw LLM response for a (truncated) page text, served from the cache
+        when the same text was sent before
+        """
+        return self._cached_response(page_text, lambda: self._extract_page_response(page_text))
+    
+    def _cached_response(self, key_text: str, produce: Callable[[], str]) -> str:
+        """
+        Response cached under a digest of key_text, calling produce() on a miss
+        (checks memory, then the disk cache shared with earlier runs)
+        
+        Args:
+            key_text: Text the response depends on (the prompted content)
+            produce: Makes the LLM call
+            
+        Returns:
+            Raw response ('' if the call failed; failures aren't cached)
+        """
+        # Check cache first; the model is part of the key as the disk cache
+        # outlives this instance
+        digest = hashlib.blake2b(self.model.encode('utf-8'), digest_size=16)
+        digest.update(b'\0')
+        digest.update(key_text.encode('utf-8', 'surrogatepass'))
+        cache_key = digest.digest()
+        with self._cache_lock:
+            response = self.cache.get(cache_key)
+            if response is not None:
+                self.cache.move_to_end(cache_key)
         
+        if response is None and self.disk_cache is not None:
+            response = self.disk_cache.get(cache_key)
+            if response is not None:
+                self._remember(cache_key, response)
+        
+        if response is None:
+            response = produce()
+            # Failed calls come back empty; leave them to be retried
+            if response:
+                self._remember(cache_key, response)
+                if self.disk_cache is not None:
+                    self.disk_cache.set(cache_key, response, expire=LLM_CACHE_EXPIRE)
+        
+        return response
+    
+    def _remember(self, cache_key: bytes, response: str):
+        """Add a response to the in-memory LRU cache"""
+        with self._cache_lock:
+            self.cache[cache_key] = response
+            if len(self.cache) > PAGE_CACHE_SIZE:
+                self.cache.popitem(last=False)
+    
+    def _extract_page_response(self, page_text: str) -> str:
+        """Raw LLM response to the key-point extraction prompt for a page"""
         prompt = f"""Extract key points from this educational page. Format as:
 
 DEFINITIONS:
@@ -134,91 +321,210 @@ IMPORTANT_POINTS:
 - [key fact]
 
 Content:
-{page_text[:2000]}
+{page_text}
 
 Be brief and clear."""
 
-        response = self.generate(prompt, max_tokens=400, temperature=0.1)
+        return self.generate(prompt, max_tokens=400, temperature=0.1)
+    
+    def extract_pages_batch(self, pages: List[Tuple[str, int]],
+                            progress_callback: Optional[Callable[[int, int], None]] = None,
+                            pages_per_prompt: Optional[int] = None,
+                            on_prefix: Optional[Callable[[List[Dict[str, any]]], None]] = None
+                            ) -> List[Dict[str, any]]:
+        """
+        Run extract_page_content over many pages with concurrent requests
         
-        # Parse and cache
-        content = self._parse_response(response, page_num)
-        self.cache[cache_key] = content
-        return content
+        Page prompts are independent, so up to LLM_PAGE_WORKERS of them are
+        sent at once and the network/queueing wait overlaps. With
+        pages_per_prompt > 1, that many pages share one prompt, cutting the
+        number of calls (and their per-call overhead) by the same factor.
+        
+        Args:
+            pages: List of (page_text, page_num) tuples
+            progress_callback: Called as (completed, total) after each distinct
+                page, from the calling thread
+            pages_per_prompt: Pages per LLM call (defaults to LLM_PAGES_PER_PROMPT)
+            on_prefix: Called, from the calling thread, with the content of the
+                leading pages finished so far each time that run grows (the
+                list keeps growing afterwards; copy it to keep it)
+            
+        Returns:
+            Content dict of each page, in the same order
+        """
+        if pages_per_prompt is None:
+            pages_per_prompt = LLM_PAGES_PER_PROMPT
+        
+        # Identical page texts are sent once and parsed per page
+        texts = [page_text[:PAGE_PROMPT_CHARS] for page_text, _ in pages]
+        distinct = list(dict.fromkeys(texts))
+        if pages_per_prompt > 1:
+            units = [distinct[i:i + pages_per_prompt] for i in range(0, len(distinct), pages_per_prompt)]
+        else:
+            units = [[text] for text in distinct]
+        
+        responses = {}
+        max_workers = GROQ_PAGE_WORKERS if self.use_groq else LLM_PAGE_WORKERS
+        num_workers = max(1, min(max_workers, len(units)))
+        
+        results = []
+        
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(self._unit_responses, unit) for unit in units]
+            for future in as_completed(futures):
+                responses.update(future.result())
+                if progress_callback:
+                    progress_callback(len(responses), len(distinct))
+                
+                # Parse the leading pages as soon as they're all answered
+                ready = len(results)
+                while len(results) < len(pages) and texts[len(results)] in responses:
+                    index = len(results)
+                    results.append(self._parse_response(responses[texts[index]], pages[index][1]))
+                if on_prefix and len(results) > ready:
+                    on_prefix(results)
+        
+        return results
+    
+    def _unit_responses(self, texts: List[str]) -> Dict[str, str]:
+        """Raw response of each page text in one unit of work (one or more pages per call)"""
+        if len(texts) == 1:
+            return {texts[0]: self._page_response(texts[0])}
+        return self._group_responses(texts)
+    
+    def _group_responses(self, texts: List[str]) -> Dict[str, str]:
+        """
+        Extract several pages with a single LLM call
+        
+        Each page is introduced by a ===PAGE n=== marker (n counting from 1
+        within the group) that the model is asked to repeat, and the response
+        is split back on those markers. Pages the model skipped are sent
+        again on their own.
+        
+        Args:
+            texts: Page texts (already truncated to PAGE_PROMPT_CHARS)
+            
+        Returns:
+            Dict of page text -> raw response for that page
+        """
+        pages_block = "\n\n".join(
+            f"===PAGE {n}===\n{text[:GROUPED_PAGE_CHARS]}" for n, text in enumerate(texts, 1)
+        )
+        prompt = f"""Extract key points from each of these educational pages.
+For every page, first repeat its marker line exactly (e.g. ===PAGE 1===), then format as:
+
+DEFINITIONS:
+- [term: meaning]
+
+CONCEPTS:
+- [important idea]
+
+PROCEDURES:
+- [step]
+
+IMPORTANT_POINTS:
+- [key fact]
+
+Pages:
+{pages_block}
+
+Be brief and clear."""
+        
+        response = self._cached_response(
+            prompt, lambda: self.generate(prompt, max_tokens=400 * len(texts), temperature=0.1)
+        )
+        
+        # Split on the markers: [before, n1, section1, n2, section2, ...]
+        parts = PAGE_MARKER.split(response)
+        sections = {int(n): section.strip() for n, section in zip(parts[1::2], parts[2::2])}
+        
+        return {
+            text: sections.get(n) or self._page_response(text)
+            for n, text in enumerate(texts, 1)
+        }
     
     def _parse_response(self, response: str, page_num: int) -> Dict[str, any]:
         """Parse LLM response into structured format"""
         
     def _parse_response(self, response: str, page_num: int) -> Dict[str, any]:
         """Parse LLM response into structured format"""
+        # Locate every section header once for all four sections
+        headers = {name: response.find(name) for name in RESPONSE_SECTIONS}
         content = {
             'page': page_num,
-            'definitions': self._extract_section(response, 'DEFINITIONS:'),
-            'concepts': self._extract_section(response, 'CONCEPTS:'),
-            'procedures': self._extract_section(response, 'PROCEDURES:'),
-            'important_points': self._extract_section(response, 'IMPORTANT_POINTS:')
+            'definitions': self._extract_section(response, 'DEFINITIONS:', headers),
+            'concepts': self._extract_section(response, 'CONCEPTS:', headers),
+            'procedures': self._extract_section(response, 'PROCEDURES:', headers),
+            'important_points': self._extract_section(response, 'IMPORTANT_POINTS:', headers)
         }
         return content
     
-    def _extract_section(self, text: str, section_name: str) -> List[str]:
-        """Extract bullet points from a section"""
+    def _extract_section(self, text: str, section_name: str,
+                         headers: Optional[Dict[str, int]] = None) -> List[str]:
+        """
+        Extract bullet points from a section
+        
+        Args:
+            text: LLM response
+            section_name: Header of the section to read
+            headers: First position of each RESPONSE_SECTIONS header in text
+                (-1 if absent), when the caller has already located them
+            
+        Returns:
+            Up to MAX_SECTION_ITEMS bullet texts
+        """
         items = []
+        if headers is None:
+            headers = {name: text.find(name) for name in RESPONSE_SECTIONS}
         
-        if section_name not in text:
+        # Find the section
+        start = headers[section_name]
+        if start == -1:
             return items
         
-        # Find the section
-        start = text.find(section_name)
-        # Find next section or end
-        next_sections = ['DEFINITIONS:', 'CONCEPTS:', 'PROCEDURES:', 'IMPORTANT_POINTS:']
+        # Find next section or end; a header first seen before this section
+        # may still occur again after it, so only then search from start
         end = len(text)
-        
-        for next_section in next_sections:
-            if next_section != section_name and next_section in text[start:]:
-                pos = text[start:].find(next_section)
+        for next_section in RESPONSE_SECTIONS:
+            if next_section != section_name:
+                pos = headers[next_section]
+                if 0 <= pos < start:
+                    pos = text.find(next_section, start)
                 if pos != -1:
-                    end = min(end, start + pos)
-        
-        section_text = text[start:end]
+                    end = min(end, pos)
         
         # Extract bullet points
-        lines = section_text.split('\n')
+        lines = text[start:end].split('\n')
         for line in lines[1:]:  # Skip the section header
             line = line.strip()
             # Match bullets: -, •, *, 1., etc.
-            if line and (line.startswith('-') or line.startswith('•') or 
-                        line.startswith('*') or (line[0].isdigit() and '.' in line[:3])):
+            if line and (line.startswith(BULLET_PREFIXES) or
+                        (line[0].isdigit() and '.' in line[:3])):
                 # Remove the bullet/number
-                clean_line = line.lstrip('-•*0123456789. ').strip()
+                clean_line = line.lstrip(BULLET_STRIP_CHARS).strip()
                 if len(clean_line) > 10:  # Minimum length
                     items.append(clean_line)
+                    if len(items) == MAX_SECTION_ITEMS:
+                        break
         
-        return items[:8]  # Max 8 items per section per page
+        return items  # Max 8 items per section per page
     
-    def synthesize_notes(self, all_pages_content: List[Dict]) -> str:
+    def synthesize_notes(self, all_pages_content: List[Dict],
+                         on_token: Optional[Callable[[str], None]] = None) -> str:
         """
         Synthesize comprehensive notes from all extracted content
         
         Args:
             all_pages_content: List of content dicts from each page
+            on_token: Called with each piece of the synthesis as it streams in
             
         Returns:
             Formatted comprehensive study notes
         """
-        # Compile all content
-        all_definitions = []
-        all_concepts = []
-        all_procedures = []
-        all_points = []
-        
-        for page_content in all_pages_content:
-            for defn in page_content.get('definitions', []):
-                all_definitions.append(f"{defn} (Page {page_content['page']})")
-            for concept in page_content.get('concepts', []):
-                all_concepts.append(f"{concept} (Page {page_content['page']})")
-            for proc in page_content.get('procedures', []):
-                all_procedures.append(f"{proc} (Page {page_content['page']})")
-            for point in page_content.get('important_points', []):
-                all_points.append(f"{point} (Page {page_content['page']})")
+        # Compile only the leading items the prompt uses
+        definitions = '\n'.join(self._tagged_items(all_pages_content, 'definitions', SYNTHESIS_DEFINITIONS))
+        concepts = '\n'.join(self._tagged_items(all_pages_content, 'concepts', SYNTHESIS_CONCEPTS))
+        points = '\n'.join(self._tagged_items(all_pages_content, 'important_points', SYNTHESIS_POINTS))
         
         # Quick synthesis - just organize by topic
         prompt = f"""Create a clear, well-organized study summary from these points.
@@ -230,16 +536,32 @@ Write a coherent 2-3 paragraph summary that:
 4. Is easy to understand for students
 
 Key points to cover:
-{chr(10).join(all_definitions[:8])}
-{chr(10).join(all_concepts[:8])}
-{chr(10).join(all_points[:12])}
+{definitions}
+{concepts}
+{points}
 
 Write a clear, flowing summary (not bullet points). Keep it concise but informative."""
 
-        synthesis = self.generate(prompt, max_tokens=500, temperature=0.3)
+        synthesis = self.generate(prompt, max_tokens=500, temperature=0.3, on_token=on_token)
         
         return synthesis
     
+    def _tagged_items(self, all_pages_content: List[Dict], field: str, limit: int) -> List[str]:
+        """
+        First items of one field across pages, each tagged with its page
+        
+        Args:
+            all_pages_content: List of content dicts from each page
+            field: Content field to collect (e.g. 'definitions')
+            limit: Maximum number of items to return
+            
+        Returns:
+            Up to limit strings formatted as "item (Page N)"
+        """
+        return list(islice((f"{item} (Page {page['page']})"
+                            for page in all_pages_content
+                            for item in page.get(field, ())), limit))
+    
     def generate_qa(self, all_pages_content: List[Dict], num_questions: int = 10) -> List[Dict[str, str]]:
         """
         Generate high-quality Q&A pairs from content
@@ -251,14 +573,11 @@ Write a clear, flowing summary (not bullet points). Keep it concise but informat
         Returns:
             List of {'question': str, 'answer': str} dicts
         """
-        # Compile key content
-        all_content = []
-        for page in all_pages_content:
-            all_content.extend(page.get('definitions', []))
-            all_content.extend(page.get('concepts', []))
-            all_content.extend(page.get('important_points', []))
-        
-        content_text = chr(10).join(all_content[:20])
+        # Compile key content, stopping once the prompt has enough
+        content_text = '\n'.join(islice((item
+                                          for page in all_pages_content
+                                          for field in ('definitions', 'concepts', 'important_points')
+                                          for item in page.get(field, ())), QA_CONTENT_ITEMS))
         
         prompt = f"""Generate {num_questions} exam-style questions and answers from this educational content.
 
@@ -280,24 +599,98 @@ Make questions:
 
         response = self.generate(prompt, max_tokens=800, temperature=0.4)
         
-        # Parse Q&A
+        # Parse Q&A: one regex pass picks out the Q/A lines, skipping the rest
         qa_pairs = []
-        lines = response.split('\n')
         current_q = None
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Q') and ':' in line:
-                current_q = line.split(':', 1)[1].strip()
-            elif line.startswith('A') and ':' in line and current_q:
-                answer = line.split(':', 1)[1].strip()
-                qa_pairs.append({'question': current_q, 'answer': answer})
+        for kind, text in QA_LINE.findall(response):
+            if kind == 'Q':
+                current_q = text.strip()
+            elif current_q:
+                qa_pairs.append({'question': current_q, 'answer': text.strip()})
                 current_q = None
         
         return qa_pairs[:num_questions]
     
+    def synthesize_and_generate_qa(self, all_pages_content: List[Dict],
+                                   num_questions: int = 10,
+                                   on_token: Optional[Callable[[str], None]] = None
+                                   ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Run synthesize_notes and generate_qa concurrently
+        
+        Both only read the extracted page content, so their two LLM calls
+        can be in flight at the same time. Q&A runs in a worker thread and
+        the synthesis in the calling one, so on_token is called from there.
+        
+        Args:
+            all_pages_content: List of content dicts from each page
+            num_questions: Number of Q&A pairs to generate
+            on_token: Called with each piece of the synthesis as it streams in
+            
+        Returns:
+            Tuple of (synthesized notes, Q&A pairs)
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            qa_pairs = executor.submit(self.generate_qa, all_pages_content, num_questions)
+            synthesis = self.synthesize_notes(all_pages_content, on_token=on_token)
+            return synthesis, qa_pairs.result()
+    
+    def extract_and_synthesize(self, pages: List[Tuple[str, int]], num_questions: int = 10,
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               pages_per_prompt: Optional[int] = None
+                               ) -> Tuple[List[Dict[str, any]], str, List[Dict[str, str]]]:
+        """
+        Extract all pages, then synthesize notes and generate Q&A from them
+        
+        Synthesis and Q&A only read the first few items of content in page
+        order, so each is started as soon as the finished leading pages hold
+        all the items its prompt uses, overlapping it with the remaining page
+        requests. Results are the same as running the three steps in turn.
+        
+        Args:
+            pages: List of (page_text, page_num) tuples
+            num_questions: Number of Q&A pairs to generate
+            progress_callback: Called as (completed, total) after each distinct
+                page, from the calling thread
+            pages_per_prompt: Pages per LLM call (defaults to LLM_PAGES_PER_PROMPT)
+            
+        Returns:
+            Tuple of (content dict of each page, synthesized notes, Q&A pairs)
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            tasks = {}
+            
+            def start_ready_tasks(leading_pages):
+                if 'synthesis' not in tasks and self._synthesis_inputs_complete(leading_pages):
+                    tasks['synthesis'] = executor.submit(self.synthesize_notes, list(leading_pages))
+                if 'qa' not in tasks and self._qa_inputs_complete(leading_pages):
+                    tasks['qa'] = executor.submit(self.generate_qa, list(leading_pages), num_questions)
+            
+            pages_content = self.extract_pages_batch(pages, progress_callback, pages_per_prompt,
+                                                     on_prefix=start_ready_tasks)
+            
+            # Short documents: start whatever is still waiting on all pages
+            if 'synthesis' not in tasks:
+                tasks['synthesis'] = executor.submit(self.synthesize_notes, pages_content)
+            if 'qa' not in tasks:
+                tasks['qa'] = executor.submit(self.generate_qa, pages_content, num_questions)
+            
+            return pages_content, tasks['synthesis'].result(), tasks['qa'].result()
+    
+    def _synthesis_inputs_complete(self, pages_content: List[Dict]) -> bool:
+        """Whether these leading pages hold every item the synthesis prompt uses"""
+        return (sum(len(p.get('definitions', [])) for p in pages_content) >= SYNTHESIS_DEFINITIONS
+                and sum(len(p.get('concepts', [])) for p in pages_content) >= SYNTHESIS_CONCEPTS
+                and sum(len(p.get('important_points', [])) for p in pages_content) >= SYNTHESIS_POINTS)
+    
+    def _qa_inputs_complete(self, pages_content: List[Dict]) -> bool:
+        """Whether these leading pages hold every item the Q&A prompt uses"""
+        return sum(len(p.get('definitions', [])) + len(p.get('concepts', []))
+                   + len(p.get('important_points', [])) for p in pages_content) >= QA_CONTENT_ITEMS
+    
     def test_connection(self) -> bool:
-        """Test if LLM is accessible"""
+        """Test if LLM is accessible (with Ollama this also loads the model, warming it up)"""
         try:
             response = self.generate("Test", max_tokens=10, temperature=0.1)
             return len(response) > 0
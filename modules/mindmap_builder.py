@@ -4,8 +4,8 @@ Creates hierarchical topic structure from text
 """
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans, AgglomerativeClustering
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.cluster import MiniBatchKMeans, AgglomerativeClustering
 from sklearn.metrics.pairwise import cosine_similarity
 from typing import List, Dict, Any
 import logging
@@ -14,6 +14,32 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Vocabulary size used to cluster sentences (the most frequent terms)
+CLUSTER_MAX_FEATURES = 100
+# Sentences per mini-batch step when clustering
+CLUSTER_BATCH_SIZE = 128
+
+
+def _tfidf_from_counts(counts, max_features: int = None):
+    """
+    TF-IDF matrix from a term-count matrix, as TfidfVectorizer would build it
+    from the same documents
+    
+    Args:
+        counts: Sparse float64 document-term counts (columns in vocabulary order)
+        max_features: Keep only this many most frequent terms, selected the
+            way TfidfVectorizer(max_features=...) does
+            
+    Returns:
+        Sparse L2-normalised TF-IDF matrix
+    """
+    if max_features is not None and counts.shape[1] > max_features:
+        term_totals = np.asarray(counts.sum(axis=0)).ravel()
+        kept = np.sort((-term_totals).argsort()[:max_features])
+        counts = counts[:, kept]
+    return TfidfTransformer().fit_transform(counts)
+
+
 class MindmapBuilder:
     """Build hierarchical mindmap structure from text"""
     
@@ -37,11 +63,24 @@ class MindmapBuilder:
         if not sentences or len(sentences) < 3:
             return {'topics': []}
         
+        # Lowercase once, for tokenizing and for matching topic keywords
+        lowered = [sentence.lower() for sentence in sentences]
+        
+        # Tokenize once; clustering and subtopic ranking both derive their
+        # TF-IDF matrices from these counts (float64, as TfidfVectorizer
+        # counts, so frequency ties in term selection break the same way)
+        try:
+            counts = CountVectorizer(stop_words='english', lowercase=False,
+                                     dtype=np.float64).fit_transform(lowered)
+        except ValueError as e:
+            logger.error(f"Vectorization error: {str(e)}")
+            counts = None
+        
         # Cluster sentences into topics
-        clusters = self._cluster_sentences(sentences, n_clusters=max_topics)
+        clusters = self._cluster_sentences(sentences, counts, n_clusters=max_topics)
         
         # Build topic hierarchy
-        topics = self._build_topics(sentences, clusters, keywords)
+        topics = self._build_topics(sentences, clusters, keywords, counts, lowered)
         
         # Create tree structure
         mindmap = {
@@ -54,29 +93,34 @@ class MindmapBuilder:
         
         return mindmap
     
-    def _cluster_sentences(self, sentences: List[str], 
+    def _cluster_sentences(self, sentences: List[str], counts,
                           n_clusters: int) -> np.ndarray:
         """
-        Cluster sentences using KMeans
+        Cluster sentences using mini-batch KMeans
         
         Args:
             sentences: List of sentences
+            counts: Term counts of the sentences (None if none could be taken)
             n_clusters: Number of clusters
             
         Returns:
             Array of cluster labels
         """
         try:
+            if counts is None:
+                raise ValueError("no vocabulary to cluster on")
+            
             # Limit clusters to reasonable number
             n_clusters = min(n_clusters, len(sentences) // 2, 8)
             n_clusters = max(n_clusters, 2)
             
             # Vectorize sentences
-            vectorizer = TfidfVectorizer(stop_words='english', max_features=100)
-            tfidf_matrix = vectorizer.fit_transform(sentences)
+            tfidf_matrix = _tfidf_from_counts(counts, max_features=CLUSTER_MAX_FEATURES)
             
             # Cluster
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+            kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3,
+                                     batch_size=min(CLUSTER_BATCH_SIZE, len(sentences)),
+                                     max_iter=50, reassignment_ratio=0.01)
             clusters = kmeans.fit_predict(tfidf_matrix)
             
             return clusters
@@ -87,7 +131,9 @@ class MindmapBuilder:
     
     def _build_topics(self, sentences: List[str], 
                      clusters: np.ndarray,
-                     keywords: List[tuple]) -> List[Dict[str, Any]]:
+                     keywords: List[tuple],
+                     counts=None,
+                     lowered: List[str] = None) -> List[Dict[str, Any]]:
         """
         Build topic structure from clusters
         
@@ -95,26 +141,37 @@ class MindmapBuilder:
             sentences: List of sentences
             clusters: Cluster labels for each sentence
             keywords: Global keywords
+            counts: Term counts of the sentences, if available
+            lowered: Lowercased sentences, if already computed
             
         Returns:
             List of topic dictionaries
         """
+        if lowered is None:
+            lowered = [sentence.lower() for sentence in sentences]
+        
         topics = []
         keyword_dict = {kw.lower(): score for kw, score in keywords[:20]}
+        # Keywords by descending score, ranked once for all clusters
+        ranked_keywords = [keyword for keyword, score in sorted(keyword_dict.items(),
+                                                                key=lambda x: x[1],
+                                                                reverse=True)]
         
         for cluster_id in range(clusters.max() + 1):
             # Get sentences in this cluster
-            cluster_sentences = [sentences[i] for i in range(len(sentences)) 
-                               if clusters[i] == cluster_id]
+            cluster_indices = np.flatnonzero(clusters == cluster_id)
+            cluster_sentences = [sentences[i] for i in cluster_indices]
             
             if not cluster_sentences:
                 continue
             
             # Extract topic name from keywords in cluster
-            topic_name = self._extract_topic_name(cluster_sentences, keyword_dict)
+            topic_name = self._extract_topic_name(cluster_sentences, ranked_keywords,
+                                                  [lowered[i] for i in cluster_indices])
             
             # Get subtopics (key sentences)
-            subtopics = self._extract_subtopics(cluster_sentences)
+            cluster_counts = counts[cluster_indices] if counts is not None else None
+            subtopics = self._extract_subtopics(cluster_sentences, cluster_counts)
             
             topics.append({
                 'name': topic_name,
@@ -125,25 +182,25 @@ class MindmapBuilder:
         return topics
     
     def _extract_topic_name(self, sentences: List[str], 
-                           keyword_dict: Dict[str, float]) -> str:
+                           ranked_keywords: List[str],
+                           lowered: List[str]) -> str:
         """
         Extract a name for the topic from its sentences
         
         Args:
             sentences: Sentences in the cluster
-            keyword_dict: Dictionary of keywords and scores
+            ranked_keywords: Lowercased keywords, highest score first
+            lowered: The same sentences, lowercased
             
         Returns:
             Topic name string
         """
         # Combine all sentences
-        combined_text = ' '.join(sentences).lower()
+        combined_text = ' '.join(lowered)
         
         # Find most relevant keywords
         topic_keywords = []
-        for keyword, score in sorted(keyword_dict.items(), 
-                                    key=lambda x: x[1], 
-                                    reverse=True):
+        for keyword in ranked_keywords:
             if keyword in combined_text:
                 topic_keywords.append(keyword.title())
                 if len(topic_keywords) >= 3:
@@ -156,13 +213,15 @@ class MindmapBuilder:
             first_words = ' '.join(sentences[0].split()[:4])
             return first_words + '...'
     
-    def _extract_subtopics(self, sentences: List[str], 
+    def _extract_subtopics(self, sentences: List[str], counts=None,
                           max_subtopics: int = 4) -> List[str]:
         """
         Extract subtopics (key sentences) from cluster
         
         Args:
             sentences: Sentences in cluster
+            counts: Rows of the document term counts for these sentences
+                (tokenized here if not given)
             max_subtopics: Maximum number of subtopics
             
         Returns:
@@ -171,19 +230,27 @@ class MindmapBuilder:
         # Limit number of subtopics
         num_subtopics = min(max_subtopics, len(sentences))
         
-        if num_subtopics <= 2:
+        # Nothing to rank when every sentence is kept (or only two are)
+        if num_subtopics <= 2 or num_subtopics == len(sentences):
             return sentences[:num_subtopics]
         
         try:
-            # Use TF-IDF to find most representative sentences
-            vectorizer = TfidfVectorizer(stop_words='english')
-            tfidf_matrix = vectorizer.fit_transform(sentences)
+            if counts is None:
+                counts = CountVectorizer(stop_words='english', dtype=np.float64).fit_transform(sentences)
             
-            # Calculate average TF-IDF score for each sentence
-            scores = np.asarray(tfidf_matrix.mean(axis=1)).flatten()
+            # Use TF-IDF over the cluster's own vocabulary (terms it uses) to
+            # find most representative sentences
+            used_terms = np.flatnonzero(counts.getnnz(axis=0))
+            if not used_terms.size:
+                raise ValueError("cluster has no vocabulary")
+            tfidf_matrix = _tfidf_from_counts(counts[:, used_terms])
             
-            # Get top sentences
-            top_indices = scores.argsort()[-num_subtopics:][::-1]
+            # Total TF-IDF score of each sentence (ranks like the average:
+            # every row has the same number of columns)
+            scores = tfidf_matrix.sum(axis=1).A1
+            
+            # Get top sentences, selected without a full sort
+            top_indices = np.argpartition(scores, -num_subtopics)[-num_subtopics:]
             top_indices = sorted(top_indices)  # Keep original order
             
             return [sentences[i] for i in top_indices]
@@ -254,26 +321,16 @@ class MindmapBuilder:
         Returns:
             Simple hierarchy structure
         """
-        # Group by top keywords
+        # Group by top keywords (lowercased once, not per sentence)
         keyword_groups = {}
-        top_keywords = [kw for kw, score in keywords[:8]]
+        top_keywords = [(kw, kw.lower()) for kw, score in keywords[:8]]
         
         for sentence in sentences:
             sentence_lower = sentence.lower()
-            assigned = False
-            
-            for keyword in top_keywords:
-                if keyword.lower() in sentence_lower:
-                    if keyword not in keyword_groups:
-                        keyword_groups[keyword] = []
-                    keyword_groups[keyword].append(sentence)
-                    assigned = True
-                    break
-            
-            if not assigned:
-                if 'Other Topics' not in keyword_groups:
-                    keyword_groups['Other Topics'] = []
-                keyword_groups['Other Topics'].append(sentence)
+            # First keyword, in rank order, that the sentence mentions
+            group = next((keyword for keyword, keyword_lower in top_keywords
+                          if keyword_lower in sentence_lower), 'Other Topics')
+            keyword_groups.setdefault(group, []).append(sentence)
         
         # Build structure
         topics = []
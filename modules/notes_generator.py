@@ -3,10 +3,13 @@ Notes Generator - Main Pipeline
 Orchestrates all modules to generate complete notes from PDF
 """
 
+import io
 import os
 import json
-from datetime import datetime
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Union, BinaryIO
 import logging
 
 from .pdf_extractor import PDFExtractor
@@ -21,6 +24,31 @@ from .llm_summarizer import LLMSummarizer
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# orjson serializes the saved results in Rust; falls back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Threads for the independent analysis steps (keywords, ranking)
+ANALYSIS_WORKERS = 2
+
+
+def _elapsed_since(start_ns: int) -> timedelta:
+    """Time since a perf_counter_ns() reading, as a timedelta for display"""
+    return timedelta(microseconds=(time.perf_counter_ns() - start_ns) // 1000)
+
+
+def _write_output(path: str, data: Union[str, bytes]):
+    """Write one output file; text goes through text mode for native newlines"""
+    if isinstance(data, bytes):
+        with open(path, 'wb') as f:
+            f.write(data)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
+
 
 class NotesGenerator:
     """Main pipeline to generate notes from PDF"""
@@ -35,36 +63,65 @@ class NotesGenerator:
         self.qa_generator = QAGenerator()
         self.intelligent_extractor = IntelligentExtractor()
         
-        # LLM-based summarizer for best quality
+        # LLM-based summarizer for best quality. The connection test is a
+        # network round trip (and an Ollama model load), so it is deferred to
+        # verify_llm() instead of blocking construction
         self.use_llm = use_llm
+        self.llm_requested = use_llm
+        self._llm_verified = False
         if use_llm:
             try:
                 self.llm_summarizer = LLMSummarizer()
-                if self.llm_summarizer.test_connection():
-                    logger.info("✅ LLM Summarizer enabled - BEST QUALITY MODE")
-                else:
-                    logger.warning("⚠️ LLM not available, using traditional methods")
-                    self.use_llm = False
             except Exception as e:
                 logger.warning(f"⚠️ LLM init failed: {e}, using traditional methods")
                 self.use_llm = False
+                self.llm_requested = False
         
         self.results = {}
     
-    def generate_notes(self, pdf_path: str, 
+    def verify_llm(self) -> bool:
+        """
+        Check that the LLM answers, falling back to traditional methods if not
+        
+        A successful check is remembered; a failed one is retried on the next
+        call, so a server that comes up later is picked up again.
+        
+        Returns:
+            Whether this generator will use the LLM
+        """
+        if not self.llm_requested:
+            return False
+        
+        if not self._llm_verified:
+            if self.llm_summarizer.test_connection():
+                logger.info("✅ LLM Summarizer enabled - BEST QUALITY MODE")
+                self._llm_verified = True
+            else:
+                logger.warning("⚠️ LLM not available, using traditional methods")
+        
+        self.use_llm = self._llm_verified
+        return self.use_llm
+    
+    def generate_notes(self, pdf_path: Union[str, BinaryIO], 
                       output_dir: str = None) -> Dict[str, Any]:
         """
         Generate complete notes from PDF
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a binary file-like object (e.g. an
+                in-memory upload) with an optional ``name`` attribute
             output_dir: Directory to save outputs
             
         Returns:
             Dictionary with all generated components
         """
-        logger.info(f"Starting notes generation for: {pdf_path}")
-        start_time = datetime.now()
+        filename = self._source_name(pdf_path)
+        logger.info(f"Starting notes generation for: {filename}")
+        start_ns = time.perf_counter_ns()  # monotonic, unaffected by clock changes
+        
+        # Settle the mode before any work (no-op once verified or after a fallback)
+        if self.use_llm and not self._llm_verified:
+            self.verify_llm()
         
         try:
             # Step 1: Extract text from PDF
@@ -72,40 +129,37 @@ class NotesGenerator:
             extraction_result = self.pdf_extractor.extract_text(pdf_path)
             text = extraction_result['text']
             pages_data = extraction_result['pages']  # NEW: Page-wise data
+            word_count = extraction_result['word_count']  # len(text.split()), counted once
             
-            logger.info(f"PDF extraction: {len(pages_data)} pages, {len(text.split())} words")
+            logger.info(f"PDF extraction: {len(pages_data)} pages, {word_count} words")
             
-            if not text or len(text.split()) < 10:  # Need at least 10 words
-                raise ValueError(f"Insufficient text extracted from PDF. Only got {len(text.split())} words. Preview: {text[:200]}")
+            if not text or word_count < 10:  # Need at least 10 words
+                raise ValueError(f"Insufficient text extracted from PDF. Only got {word_count} words. Preview: {text[:200]}")
             
             # ===== LLM-BASED PIPELINE (BEST QUALITY) =====
             if self.use_llm and hasattr(self, 'llm_summarizer'):
                 logger.info("🚀 Using LLM-based extraction for BEST QUALITY")
                 
                 # STAGE 1: Extract from each page using LLM
+                # STAGES 2 & 3: Synthesize comprehensive notes and generate
+                # Q&A, each started as soon as the pages it needs are done
                 logger.info("Stage 1: LLM extracting content from each page...")
-                llm_pages_content = []
-                for i, page_data in enumerate(pages_data[:20], 1):  # Process up to 20 pages
+                def report_page(done, total):
                     if self.progress_callback:
-                        self.progress_callback(f"🎬 Processing Page {i}/{min(len(pages_data), 20)}...")
-                    logger.info(f"  Processing page {i}/{min(len(pages_data), 20)}...")
-                    page_content = self.llm_summarizer.extract_page_content(
-                        page_data['text'], 
-                        page_data['page_num']
-                    )
-                    llm_pages_content.append(page_content)
+                        self.progress_callback(f"🎬 Processed Page {done}/{total}...")
+                    logger.info(f"  Processed page {done}/{total}")
+                    if done == total:
+                        if self.progress_callback:
+                            self.progress_callback("🎭 Synthesizing Notes & Practice Questions...")
+                        logger.info("Stages 2 & 3: Synthesizing study notes and generating Q&A pairs...")
                 
-                # STAGE 2: Synthesize comprehensive notes
-                if self.progress_callback:
-                    self.progress_callback("🎭 Synthesizing Comprehensive Notes...")
-                logger.info("Stage 2: Synthesizing comprehensive study notes...")
-                llm_comprehensive_notes = self.llm_summarizer.synthesize_notes(llm_pages_content)
-                
-                # STAGE 3: Generate Q&A from content
-                if self.progress_callback:
-                    self.progress_callback("📝 Generating Practice Questions...")
-                logger.info("Stage 3: Generating Q&A pairs...")
-                llm_qa_pairs = self.llm_summarizer.generate_qa(llm_pages_content, num_questions=15)
+                # Process up to 20 pages, with concurrent requests
+                llm_pages_content, llm_comprehensive_notes, llm_qa_pairs = \
+                    self.llm_summarizer.extract_and_synthesize(
+                        [(page_data['text'], page_data['page_num']) for page_data in pages_data[:20]],
+                        num_questions=15,
+                        progress_callback=report_page
+                    )
                 
                 # Format LLM results
                 organized_notes = self._format_llm_notes(llm_pages_content, llm_comprehensive_notes)
@@ -129,40 +183,58 @@ class NotesGenerator:
             
             # Step 2: Preprocess text (for traditional methods)
             logger.info("Step 2: Preprocessing text...")
-            preprocessed = self.preprocessor.preprocess(text, remove_stopwords=False)
+            # Only the sentences are used, so skip whole-text word tokenization
+            preprocessed = self.preprocessor.preprocess(text, remove_stopwords=False, include_words=False)
             sentences = preprocessed['sentences']
             
-            logger.info(f"Extracted {len(sentences)} sentences from {len(text.split())} words")
+            logger.info(f"Extracted {len(sentences)} sentences from {word_count} words")
             
             if len(sentences) < 2:  # Lowered from 3 to 2
-                raise ValueError(f"Not enough content to generate notes. Only found {len(sentences)} sentences from {len(text.split())} words. Text preview: {text[:200]}...")
+                raise ValueError(f"Not enough content to generate notes. Only found {len(sentences)} sentences from {word_count} words. Text preview: {text[:200]}...")
             
-            # Step 3: Extract keywords
-            logger.info("Step 3: Extracting keywords...")
-            keyword_results = self.keyword_extractor.extract_keywords(
-                text, sentences, top_n=30  # More keywords for comprehensive coverage
-            )
-            keywords = keyword_results['combined']
+            # The LLM synthesis replaces the extractive summary
+            llm_generated = structured_content.get('llm_generated', False)
             
-            # Step 4: Rank sentences
-            logger.info("Step 4: Ranking sentences...")
-            ranked_sentences = self.sentence_ranker.rank_sentences(
-                sentences, method='combined'
-            )
-            
-            # Step 5: Generate summary
-            logger.info("Step 5: Generating comprehensive summary...")
-            summary_result = self.summarizer.generate_summary(
-                sentences, summary_ratio=0.7  # 70% coverage for comprehensive notes
-            )
-            
-            # Step 6: Generate key points
-            logger.info("Step 6: Generating comprehensive key points...")
-            key_points = self.summarizer.generate_key_points(sentences, top_n=50)
+            # Steps 3 and 4 only read the sentences, so they run side by side;
+            # the vectorizing and similarity work largely happens in native code
+            with ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS) as executor:
+                # Step 3: Extract keywords
+                logger.info("Step 3: Extracting keywords...")
+                keyword_future = executor.submit(
+                    self.keyword_extractor.extract_keywords,
+                    text, sentences, top_n=30  # More keywords for comprehensive coverage
+                )
+                
+                # Step 4: Rank sentences
+                logger.info("Step 4: Ranking sentences...")
+                ranking_future = executor.submit(
+                    self.sentence_ranker.rank_sentences, sentences, method='combined'
+                )
+                
+                # Steps 5 and 6 select from this ranking rather than ranking
+                # the same sentences again
+                ranked_sentences = ranking_future.result()
+                
+                # Step 5: Generate summary
+                summary_result = None
+                if not llm_generated:
+                    logger.info("Step 5: Generating comprehensive summary...")
+                    summary_result = self.summarizer.generate_summary(
+                        sentences, summary_ratio=0.7,  # 70% coverage for comprehensive notes
+                        ranked=ranked_sentences
+                    )
+                
+                # Step 6: Generate key points
+                logger.info("Step 6: Generating comprehensive key points...")
+                key_points = self.summarizer.generate_key_points(
+                    sentences, top_n=50, ranked=ranked_sentences
+                )
+                
+                keywords = keyword_future.result()['combined']
             
             # Step 7: Generate Q&A (use LLM if available, otherwise traditional)
             logger.info("Step 7: Generating Q&A...")
-            if self.use_llm and hasattr(self, 'llm_summarizer') and 'qa_pairs' in structured_content:
+            if llm_generated:
                 qa_pairs = structured_content['qa_pairs']
             else:
                 qa_pairs = self.qa_generator.generate_questions(
@@ -172,9 +244,9 @@ class NotesGenerator:
             # Compile results
             self.results = {
                 'metadata': {
-                    'filename': os.path.basename(pdf_path),
+                    'filename': filename,
                     'generated_at': datetime.now().isoformat(),
-                    'processing_time': str(datetime.now() - start_time),
+                    'processing_time': str(_elapsed_since(start_ns)),
                     'page_count': extraction_result['page_count'],
                     'word_count': extraction_result['word_count'],
                     'sentence_count': len(sentences),
@@ -184,9 +256,13 @@ class NotesGenerator:
                 'organized_content': organized_notes,  # NEW: Main content with page numbers
                 'structured_data': structured_content,  # NEW: Structured sections
                 'summary': {
-                    'text': structured_content.get('synthesis', summary_result['summary']) if self.use_llm else summary_result['summary'],
-                    'sentences': summary_result['sentences'] if not self.use_llm else [],
-                    'compression_ratio': f"{summary_result['ratio']:.1%}" if not self.use_llm else "AI Generated"
+                    'text': structured_content['synthesis'],
+                    'sentences': [],
+                    'compression_ratio': "AI Generated"
+                } if llm_generated else {
+                    'text': summary_result['summary'],
+                    'sentences': summary_result['sentences'],
+                    'compression_ratio': f"{summary_result['ratio']:.1%}"
                 },
                 'key_points': key_points,
                 'keywords': [{'term': kw, 'score': f"{score:.3f}"} 
@@ -200,9 +276,9 @@ class NotesGenerator:
             
             # Save to file if output directory specified
             if output_dir:
-                self._save_results(output_dir, pdf_path)
+                self._save_results(output_dir, filename)
             
-            logger.info(f"Notes generation completed in {datetime.now() - start_time}")
+            logger.info(f"Notes generation completed in {_elapsed_since(start_ns)}")
             
             return self.results
             
@@ -210,6 +286,12 @@ class NotesGenerator:
             logger.error(f"Error generating notes: {str(e)}")
             raise
     
+    @staticmethod
+    def _source_name(pdf_path: Union[str, BinaryIO]) -> str:
+        """Base filename of a PDF path or file-like object"""
+        name = pdf_path if isinstance(pdf_path, str) else getattr(pdf_path, 'name', None)
+        return os.path.basename(name) if name else 'document.pdf'
+    
     def _save_results(self, output_dir: str, pdf_path: str):
         """Save results to files"""
         os.makedirs(output_dir, exist_ok=True)
@@ -218,161 +300,172 @@ class NotesGenerator:
         base_name = os.path.splitext(os.path.basename(pdf_path))[0]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save JSON
         json_path = os.path.join(output_dir, f"{base_name}_{timestamp}.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
-        logger.info(f"Saved JSON to: {json_path}")
-        
-        # Save formatted text
         txt_path = os.path.join(output_dir, f"{base_name}_{timestamp}_notes.txt")
-        with open(txt_path, 'w', encoding='utf-8') as f:
-            f.write(self._format_notes_text())
-        logger.info(f"Saved text notes to: {txt_path}")
-        
-        # Save markdown
         md_path = os.path.join(output_dir, f"{base_name}_{timestamp}_notes.md")
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write(self._format_notes_markdown())
-        logger.info(f"Saved markdown to: {md_path}")
+        
+        # Serialize everything first, then write the three files concurrently
+        if ORJSON_AVAILABLE:
+            # Accept non-str keys and numpy values, which json.dump tolerates
+            json_data = orjson.dumps(self.results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                                     | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            json_data = json.dumps(self.results, indent=2, ensure_ascii=False)
+        outputs = [
+            (json_path, json_data, "JSON"),
+            (txt_path, self._format_notes_text(), "text notes"),
+            (md_path, self._format_notes_markdown(), "markdown"),
+        ]
+        
+        with ThreadPoolExecutor(max_workers=len(outputs)) as executor:
+            futures = [executor.submit(_write_output, path, data) for path, data, _ in outputs]
+            for future, (path, _, label) in zip(futures, outputs):
+                future.result()
+                logger.info(f"Saved {label} to: {path}")
     
     def _format_notes_text(self) -> str:
         """Format results as readable text"""
-        lines = []
-        lines.append("=" * 80)
-        lines.append("AUTOMATED NOTES")
-        lines.append("=" * 80)
-        lines.append(f"\nDocument: {self.results['metadata']['filename']}")
-        lines.append(f"Generated: {self.results['metadata']['generated_at']}")
-        lines.append(f"Pages: {self.results['metadata']['page_count']}")
-        lines.append(f"Words: {self.results['metadata']['word_count']}")
-        lines.append("\n" + "=" * 80)
+        # Write straight into one buffer; each block carries its own newlines
+        buf = io.StringIO()
+        w = buf.write
+        metadata = self.results['metadata']
+        rule = "=" * 80
+        divider = "-" * 80
+        
+        w(f"{rule}\nAUTOMATED NOTES\n{rule}\n")
+        w(f"\nDocument: {metadata['filename']}\n")
+        w(f"Generated: {metadata['generated_at']}\n")
+        w(f"Pages: {metadata['page_count']}\n")
+        w(f"Words: {metadata['word_count']}\n")
+        w(f"\n{rule}\n")
         
         # Summary
-        lines.append("\n📘 SUMMARY")
-        lines.append("-" * 80)
-        lines.append(self.results['summary']['text'])
+        w(f"\n📘 SUMMARY\n{divider}\n")
+        w(f"{self.results['summary']['text']}\n")
         
         # Key Points
-        lines.append("\n\n📌 KEY POINTS")
-        lines.append("-" * 80)
+        w(f"\n\n📌 KEY POINTS\n{divider}\n")
         for i, point in enumerate(self.results['key_points'], 1):
-            lines.append(f"{i}. {point}")
+            w(f"{i}. {point}\n")
         
         # Keywords
-        lines.append("\n\n🔑 KEYWORDS")
-        lines.append("-" * 80)
-        keywords_str = ", ".join([kw['term'] for kw in self.results['keywords']])
-        lines.append(keywords_str)
+        w(f"\n\n🔑 KEYWORDS\n{divider}\n")
+        w(", ".join([kw['term'] for kw in self.results['keywords']]))
+        w("\n")
         
         # Q&A
-        lines.append("\n📚 POSSIBLE QUESTIONS & ANSWERS")
-        lines.append("-" * 80)
+        w(f"\n📚 POSSIBLE QUESTIONS & ANSWERS\n{divider}\n")
         for i, qa in enumerate(self.results['qa_pairs'], 1):
-            lines.append(f"\nQ{i}. {qa['question']}")
-            lines.append(f"A{i}. {qa['answer']}")
+            w(f"\nQ{i}. {qa['question']}\nA{i}. {qa['answer']}\n")
         
-        lines.append("\n" + "=" * 80)
-        return '\n'.join(lines)
+        w(f"\n{rule}")
+        return buf.getvalue()
     
     def _format_llm_notes(self, pages_content: List[Dict], synthesis: str) -> str:
         """Format LLM-generated notes with beautiful markdown"""
-        lines = []
+        # Write straight into one buffer; each block carries its own newlines
+        buf = io.StringIO()
+        w = buf.write
         
-        lines.append("# 📚 AI-GENERATED COMPREHENSIVE STUDY NOTES\n")
-        lines.append(f"**Powered by:** Llama 3.1 LLM 🤖 | **Quality:** Production-Grade\n")
-        lines.append("---\n")
+        w("# 📚 AI-GENERATED COMPREHENSIVE STUDY NOTES\n\n")
+        w("**Powered by:** Llama 3.1 LLM 🤖 | **Quality:** Production-Grade\n\n")
+        w("---\n\n")
         
         # Comprehensive synthesis first
-        lines.append("## 🎯 COMPREHENSIVE OVERVIEW\n")
-        lines.append(synthesis)
-        lines.append("\n---\n")
+        w("## 🎯 COMPREHENSIVE OVERVIEW\n\n")
+        w(f"{synthesis}\n")
+        w("\n---\n\n")
         
         # Page-by-page detailed notes
-        lines.append("## 📖 DETAILED NOTES BY PAGE\n")
+        w("## 📖 DETAILED NOTES BY PAGE\n")
         
         for page_data in pages_content:
             page_num = page_data['page']
-            lines.append(f"### 📄 Page {page_num}\n")
+            w(f"\n### 📄 Page {page_num}\n\n")
             
             # Definitions
             if page_data.get('definitions'):
-                lines.append("**📖 Definitions:**\n")
+                w("**📖 Definitions:**\n\n")
                 for defn in page_data['definitions']:
-                    lines.append(f"   • {defn}\n")
-                lines.append("")
+                    w(f"   • {defn}\n\n")
+                w("\n")
             
             # Concepts
             if page_data.get('concepts'):
-                lines.append("**💡 Key Concepts:**\n")
+                w("**💡 Key Concepts:**\n\n")
                 for concept in page_data['concepts']:
-                    lines.append(f"   • {concept}\n")
-                lines.append("")
+                    w(f"   • {concept}\n\n")
+                w("\n")
             
             # Procedures
             if page_data.get('procedures'):
-                lines.append("**🔧 Procedures/Methods:**\n")
+                w("**🔧 Procedures/Methods:**\n\n")
                 for i, proc in enumerate(page_data['procedures'], 1):
-                    lines.append(f"   {i}. {proc}\n")
-                lines.append("")
+                    w(f"   {i}. {proc}\n\n")
+                w("\n")
             
             # Important points
             if page_data.get('important_points'):
-                lines.append("**📝 Important Points:**\n")
+                w("**📝 Important Points:**\n\n")
                 for point in page_data['important_points']:
-                    lines.append(f"   • {point}\n")
-                lines.append("")
+                    w(f"   • {point}\n\n")
+                w("\n")
             
-            lines.append("---\n")
+            w("---\n")
         
-        return '\n'.join(lines)
+        return buf.getvalue()
     
     def _format_notes_markdown(self) -> str:
         """Format results as comprehensive markdown study notes with page numbers"""
-        lines = []
-        lines.append(f"# 📚 COMPLETE STUDY GUIDE: {self.results['metadata']['filename']}\n")
-        lines.append(f"**Generated:** {self.results['metadata']['generated_at']}  ")
-        lines.append(f"**Pages:** {self.results['metadata']['page_count']} | "
-                    f"**Total Points Extracted:** {self.results['metadata']['points_extracted']} | "
-                    f"**Processing Time:** {self.results['metadata']['processing_time']}\n")
-        lines.append("---\n")
+        # Write straight into one buffer; each block carries its own newlines
+        buf = io.StringIO()
+        w = buf.write
+        metadata = self.results['metadata']
+        
+        w(f"# 📚 COMPLETE STUDY GUIDE: {metadata['filename']}\n\n")
+        w(f"**Generated:** {metadata['generated_at']}  \n")
+        w(f"**Pages:** {metadata['page_count']} | "
+          f"**Total Points Extracted:** {metadata['points_extracted']} | "
+          f"**Processing Time:** {metadata['processing_time']}\n\n")
+        w("---\n\n")
         
         # Add the organized content (page-by-page breakdown)
-        lines.append(self.results['organized_content'])
-        lines.append("\n---\n")
+        w(f"{self.results['organized_content']}\n")
+        w("\n---\n\n")
         
         # Additional Analysis Sections
-        lines.append("## 🔍 ADDITIONAL ANALYSIS\n")
+        w("## 🔍 ADDITIONAL ANALYSIS\n\n")
         
         # Executive Summary
-        lines.append("### 📋 Executive Summary\n")
-        lines.append(f"*Coverage: {self.results['summary']['compression_ratio']} of original content*\n")
+        w("### 📋 Executive Summary\n\n")
+        w(f"*Coverage: {self.results['summary']['compression_ratio']} of original content*\n\n")
         # Show first 500 chars of summary
         summary_preview = self.results['summary']['text'][:500] + "..." if len(self.results['summary']['text']) > 500 else self.results['summary']['text']
-        lines.append(summary_preview + "\n")
+        w(f"{summary_preview}\n\n")
         
         # Top Keywords
-        lines.append("### 🔑 Key Technical Terms\n")
+        w("### 🔑 Key Technical Terms\n\n")
         keywords_by_row = 5
         keywords = [f"**{kw['term']}**" for kw in self.results['keywords'][:20]]
         for i in range(0, len(keywords), keywords_by_row):
             row = keywords[i:i+keywords_by_row]
-            lines.append(" • ".join(row))
-        lines.append("")
+            w(" • ".join(row))
+            w("\n")
+        w("\n")
         
         # Practice Questions
-        lines.append("### ❓ Practice Questions for Revision\n")
-        lines.append(f"*{len(self.results['qa_pairs'])} questions for self-assessment*\n")
+        w("### ❓ Practice Questions for Revision\n\n")
+        w(f"*{len(self.results['qa_pairs'])} questions for self-assessment*\n\n")
         
         for i, qa in enumerate(self.results['qa_pairs'][:15], 1):  # Show first 15
-            lines.append(f"**Q{i}. {qa['question']}**\n")
-            lines.append(f"<details><summary>Show Answer</summary>\n\n{qa['answer']}\n\n</details>\n")
+            w(f"**Q{i}. {qa['question']}**\n\n")
+            w(f"<details><summary>Show Answer</summary>\n\n{qa['answer']}\n\n</details>\n\n")
         
         # Footer
-        lines.append("---\n")
-        lines.append(f"*Generated by Comprehensive Study Notes Generator | {self.results['metadata']['points_extracted']} points from {self.results['metadata']['page_count']} pages*")
+        w("---\n\n")
+        w(f"*Generated by Comprehensive Study Notes Generator | {metadata['points_extracted']} points from {metadata['page_count']} pages*")
         
-        return '\n'.join(lines)
+        return buf.getvalue()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about generated notes"""
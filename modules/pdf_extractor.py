@@ -4,119 +4,372 @@ Extracts text from PDF files while removing noise and preserving structure
 """
 
 import pdfplumber
+import functools
+import hashlib
+import io
+import os
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union, BinaryIO
 import logging
+from . import advanced_cleaner
 from .advanced_cleaner import AdvancedTextCleaner
+from .process_pool import POOL_CONTEXT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import pypdfium2 for C++ text extraction (pdfplumber's layout
+# analysis runs in Python)
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    logger.warning("pypdfium2 not installed. PDF text will be extracted with pdfplumber. Install with: pip install pypdfium2")
+    PDFIUM_AVAILABLE = False
+
+# Try to import diskcache to keep extracted pages across runs
+try:
+    from diskcache import Cache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    logger.warning("diskcache not installed. PDF extraction results won't be reused across runs. Install with: pip install diskcache")
+    DISKCACHE_AVAILABLE = False
+
+# Extract with PDFium when installed; PDF_TEXT_BACKEND=pdfplumber keeps
+# pdfplumber's layout-aware text
+USE_PDFIUM = PDFIUM_AVAILABLE and os.getenv('PDF_TEXT_BACKEND', 'pdfium').lower() != 'pdfplumber'
+
+# On-disk cache of extraction results keyed by PDF content, e.g.
+# PDF_CACHE_DIR=~/.cache/notes_pdf. Off unless set, since it stores the text of
+# every uploaded document; entries expire after a week
+PDF_CACHE_DIR = os.path.expanduser(os.getenv('PDF_CACHE_DIR', ''))
+PDF_CACHE_EXPIRE = 7 * 24 * 3600
+
+# Documents with fewer pages are extracted in-process: starting worker
+# processes costs more than it saves
+PARALLEL_MIN_PAGES = 8
+MAX_EXTRACTION_WORKERS = 4
+
+# Substitutions of _clean_page_text, applied in order
+PAGE_TEXT_SUBSTITUTIONS = (
+    # Remove page numbers at top/bottom
+    (re.compile(r'^\s*\d+\s*$', re.MULTILINE), ''),
+    (re.compile(r'\s+\d+\s+Analysis and Design'), ' Analysis and Design'),
+    # Remove common headers/footers patterns
+    (re.compile(r'^Page\s+\d+.*$', re.MULTILINE | re.IGNORECASE), ''),
+    (re.compile(r'^Chapter\s+\d+.*$', re.MULTILINE | re.IGNORECASE), ''),
+    # Remove repetitive institutional headers
+    (re.compile(r'RV College of Engineering,?\s+Bengaluru[-–]?\s*\d*', re.IGNORECASE), ''),
+    (re.compile(r'\(Autonomous Institution.*?\)', re.IGNORECASE), ''),
+    (re.compile(r'affiliated to VTU,?\s+Belgaum', re.IGNORECASE), ''),
+    (re.compile(r'Department of Electronics.*?Engineering', re.IGNORECASE), ''),
+    (re.compile(r'Laboratory Manual and Observation Book', re.IGNORECASE), ''),
+    (re.compile(r'Academic Year\s+\d{4}-\d{4}'), ''),
+    (re.compile(r'Autonomous Scheme\s+\d{4}'), ''),
+    # Remove rubric tables and repetitive criteria
+    (re.compile(r'Sl\.No\s+Criteria\s+(?:Excellent\s+Good\s+Average\s+)?(?:Max\s+)?Marks.*?(?:result|Result)', re.DOTALL | re.IGNORECASE), ''),
+    (re.compile(r'(?:Data sheet|Record|Simulation|Conduction)\s+[A-Z]\s+(?:Problem statement|Design specifications|Expected output|Analysis).*?\d+', re.IGNORECASE), ''),
+    # Remove certificate boilerplate
+    (re.compile(r'This is to certify that.*?USN No\.', re.DOTALL), ''),
+    (re.compile(r'Name of the Candidate:?.*?_+'), ''),
+    # Remove standalone underscores/fill-in-blanks
+    (re.compile(r'_{3,}'), ''),
+    # Fix hyphenated words at line breaks
+    (re.compile(r'(\w+)-\s*\n\s*(\w+)'), r'\1\2'),
+    # Remove excessive whitespace
+    (re.compile(r'\n{3,}'), '\n\n'),
+    (re.compile(r' {2,}'), ' '),
+    # Remove special characters but keep basic punctuation
+    (re.compile(r'[^\w\s.,;:!?()\[\]{}\-–—\'\"°%$€£¥+=/<>\n]'), ''),
+)
+
+# Numbered headings (1. , 1.1 , etc)
+NUMBERED_HEADING = re.compile(r'^\d+\.?\s+[A-Z]')
+
+# Words that mark a short line as a heading
+HEADING_WORDS = ('introduction', 'conclusion', 'abstract', 'summary',
+                 'chapter', 'section', 'overview', 'background', 'method')
+
+@functools.lru_cache(maxsize=None)
+def _extraction_code_digest() -> bytes:
+    """
+    Digest of the extraction and cleaning code, so cached results are
+    dropped whenever either module changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (__file__, advanced_cleaner.__file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+# PDF (path or bytes) and cleaner of a worker process, set by its initializer
+_worker_source = None
+_worker_cleaner = None
+
+
+def _init_extraction_worker(source: Union[str, bytes]):
+    """Give an extraction worker process the PDF to read and its own cleaner"""
+    global _worker_source, _worker_cleaner
+    _worker_source = source
+    _worker_cleaner = AdvancedTextCleaner()
+
+
+def _extract_page_range(page_range: Tuple[int, int]) -> List[Optional[str]]:
+    """
+    Extract and clean a run of pages in a worker process
+    
+    Args:
+        page_range: (start, stop) page indices, 0-based and stop exclusive
+        
+    Returns:
+        Cleaned text of each page (None where the page has no text)
+    """
+    source = _worker_source
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    
+    start, stop = page_range
+    texts = []
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages[start:stop]:
+            page_text = page.extract_text()
+            texts.append(_worker_cleaner.clean_page_content(page_text) if page_text else None)
+    return texts
+
 
 class PDFExtractor:
     """Extract and clean text from PDF files"""
     
-    def __init__(self):
+    def __init__(self, num_workers: Optional[int] = None):
+        """
+        Args:
+            num_workers: Processes extracting pages of long PDFs with
+                pdfplumber (defaults to CPU count, capped at 4; 1 extracts
+                in-process)
+        """
         self.text = ""
         self.metadata = {}
         self.page_count = 0
         self.cleaner = AdvancedTextCleaner()  # NEW
+        if num_workers is None:
+            num_workers = min(os.cpu_count() or 1, MAX_EXTRACTION_WORKERS)
+        self.num_workers = num_workers
+        self.disk_cache = self._open_disk_cache()
+    
+    def _open_disk_cache(self):
+        """On-disk extraction cache, or None when unavailable or disabled"""
+        if not (DISKCACHE_AVAILABLE and PDF_CACHE_DIR):
+            return None
+        try:
+            return Cache(PDF_CACHE_DIR)
+        except Exception as e:
+            logger.warning(f"PDF extraction cache unavailable at {PDF_CACHE_DIR}: {e}")
+            return None
         
-    def extract_text(self, pdf_path: str) -> Dict[str, any]:
+    def extract_text(self, pdf_path: Union[str, BinaryIO]) -> Dict[str, any]:
         """
         Extract text from PDF file with page tracking
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file or binary file-like object
             
         Returns:
             Dictionary with extracted text, pages, and metadata
         """
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                self.page_count = len(pdf.pages)
-                self.metadata = pdf.metadata
-                
-                all_text = []
-                pages_data = []  # Store page-wise data
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        # Use advanced cleaner for badly formatted PDFs
-                        cleaned_text = self.cleaner.clean_page_content(page_text)
-                        if cleaned_text.strip():  # Only if there's actual content
-                            all_text.append(cleaned_text)
-                            pages_data.append({
-                                'page_num': page_num,
-                                'text': cleaned_text,
-                                'word_count': len(cleaned_text.split())
-                            })
-                
-                self.text = "\n\n".join(all_text)
-                
-                logger.info(f"Successfully extracted text from {self.page_count} pages")
-                
-                return {
-                    'text': self.text,
-                    'pages': pages_data,  # Add page-wise data
-                    'page_count': self.page_count,
-                    'metadata': self.metadata,
-                    'word_count': len(self.text.split())
+            # Workers reopen the PDF, so an uploaded file is turned into bytes;
+            # BytesIO (e.g. Streamlit uploads) hands back its buffer without
+            # the copy read() would make
+            source = pdf_path
+            if not isinstance(pdf_path, (str, os.PathLike)):
+                if hasattr(pdf_path, 'getvalue'):
+                    source = pdf_path.getvalue()
+                else:
+                    if hasattr(pdf_path, 'seek'):
+                        pdf_path.seek(0)
+                    source = pdf_path.read()
+                pdf_path = io.BytesIO(source)
+            
+            # Re-processing the same PDF (e.g. in another mode) reuses its pages
+            cache_key = self._cache_key(source) if self.disk_cache is not None else None
+            if cache_key is not None:
+                cached = self.disk_cache.get(cache_key)
+                if cached is not None:
+                    self.text = cached['text']
+                    self.page_count = cached['page_count']
+                    self.metadata = cached['metadata']
+                    logger.info(f"Reused extracted text of {self.page_count} pages")
+                    return cached
+            
+            if USE_PDFIUM:
+                cleaned_pages = self._extract_with_pdfium(source)
+            else:
+                cleaned_pages = self._extract_with_pdfplumber(pdf_path, source)
+            
+            # Pages share their strings with the joined text; the word count
+            # is summed per page instead of splitting the whole document,
+            # which would hold every word at once (same total, since pages
+            # are joined on whitespace)
+            pages_data = [  # Store page-wise data
+                {
+                    'page_num': page_num,
+                    'text': cleaned_text,
+                    'word_count': len(cleaned_text.split())
                 }
+                for page_num, cleaned_text in cleaned_pages.items()
+                if cleaned_text.strip()  # Only if there's actual content
+            ]
+            del cleaned_pages
+            
+            self.text = "\n\n".join(page['text'] for page in pages_data)
+            
+            logger.info(f"Successfully extracted text from {self.page_count} pages")
+            
+            result = {
+                'text': self.text,
+                'pages': pages_data,  # Add page-wise data
+                'page_count': self.page_count,
+                'metadata': self.metadata,
+                'word_count': sum(page['word_count'] for page in pages_data)
+            }
+            
+            if cache_key is not None:
+                try:
+                    self.disk_cache.set(cache_key, result, expire=PDF_CACHE_EXPIRE)
+                except Exception as e:
+                    logger.warning(f"Could not cache extraction result: {e}")
+            
+            return result
                 
         except Exception as e:
             logger.error(f"Error extracting PDF: {str(e)}")
             raise
     
-    def _clean_page_text(self, text: str, page_num: int) -> str:
+    def _cache_key(self, source: Union[str, os.PathLike, bytes]) -> str:
+        """Digest of the PDF content, the extraction backend and the cleaning code"""
+        digest = hashlib.blake2b(b'pdfium' if USE_PDFIUM else b'pdfplumber', digest_size=16)
+        digest.update(_extraction_code_digest())
+        if isinstance(source, bytes):
+            digest.update(source)
+        else:
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+    
+    def _extract_with_pdfium(self, source: Union[str, os.PathLike, bytes]) -> Dict[int, str]:
         """
-        Clean extracted text from a single page
+        Extract pages with PDFium (fast enough that no worker pool is needed)
         
         Args:
-            text: Raw extracted text
-            page_num: Page number
+            source: PDF path or contents
             
         Returns:
-            Cleaned text
+            Cleaned text by page number for pages with text
         """
-        # Remove page numbers at top/bottom
-        text = re.sub(r'^\s*\d+\s*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'\s+\d+\s+Analysis and Design', ' Analysis and Design', text)
-        
-        # Remove common headers/footers patterns
-        text = re.sub(r'^Page\s+\d+.*$', '', text, flags=re.MULTILINE | re.IGNORECASE)
-        text = re.sub(r'^Chapter\s+\d+.*$', '', text, flags=re.MULTILINE | re.IGNORECASE)
-        
-        # Remove repetitive institutional headers
-        text = re.sub(r'RV College of Engineering,?\s+Bengaluru[-–]?\s*\d*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\(Autonomous Institution.*?\)', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'affiliated to VTU,?\s+Belgaum', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Department of Electronics.*?Engineering', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Laboratory Manual and Observation Book', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Academic Year\s+\d{4}-\d{4}', '', text)
-        text = re.sub(r'Autonomous Scheme\s+\d{4}', '', text)
+        pdf = pdfium.PdfDocument(source)
+        try:
+            self.page_count = len(pdf)
+            self.metadata = pdf.get_metadata_dict(skip_empty=True)
+            
+            raw_pages = []
+            for page_num in range(1, self.page_count + 1):
+                page = pdf[page_num - 1]
+                textpage = page.get_textpage()
+                # PDFium ends lines with \r\n
+                page_text = textpage.get_text_range().replace('\r\n', '\n')
+                textpage.close()
+                page.close()
+                if page_text:
+                    raw_pages.append((page_num, page_text))
+        finally:
+            pdf.close()
         
-        # Remove rubric tables and repetitive criteria
-        text = re.sub(r'Sl\.No\s+Criteria\s+(?:Excellent\s+Good\s+Average\s+)?(?:Max\s+)?Marks.*?(?:result|Result)', '', text, flags=re.DOTALL | re.IGNORECASE)
-        text = re.sub(r'(?:Data sheet|Record|Simulation|Conduction)\s+[A-Z]\s+(?:Problem statement|Design specifications|Expected output|Analysis).*?\d+', '', text, flags=re.IGNORECASE)
+        return self._clean_raw_pages(raw_pages)
+    
+    def _extract_with_pdfplumber(self, pdf_path: Union[str, BinaryIO],
+                                 source: Union[str, os.PathLike, bytes]) -> Dict[int, str]:
+        """
+        Extract pages with pdfplumber, across processes for long documents
         
-        # Remove certificate boilerplate
-        text = re.sub(r'This is to certify that.*?USN No\.', '', text, flags=re.DOTALL)
-        text = re.sub(r'Name of the Candidate:?.*?_+', '', text)
+        Args:
+            pdf_path: Path to PDF file or binary file-like object
+            source: The same PDF as a path or contents, for worker processes
+            
+        Returns:
+            Cleaned text by page number for pages with text
+        """
+        with pdfplumber.open(pdf_path) as pdf:
+            self.page_count = len(pdf.pages)
+            self.metadata = pdf.metadata
+            
+            if self.num_workers > 1 and self.page_count >= PARALLEL_MIN_PAGES:
+                cleaned_pages = self._extract_pages_parallel(source)
+                if cleaned_pages is not None:
+                    return cleaned_pages
+            
+            raw_pages = []
+            for page_num, page in enumerate(pdf.pages, 1):
+                page_text = page.extract_text()
+                if page_text:
+                    raw_pages.append((page_num, page_text))
         
-        # Remove standalone underscores/fill-in-blanks
-        text = re.sub(r'_{3,}', '', text)
+        return self._clean_raw_pages(raw_pages)
+    
+    def _clean_raw_pages(self, raw_pages: List[Tuple[int, str]]) -> Dict[int, str]:
+        """Clean (page number, raw text) pairs into cleaned text by page number"""
+        # Use advanced cleaner for badly formatted PDFs; pages are
+        # independent, so they are cleaned across processes. Repeated pages
+        # (e.g. blank forms) are cleaned once
+        distinct_texts = list(dict.fromkeys(text for _, text in raw_pages))
+        cleaned_texts = dict(zip(distinct_texts, self.cleaner.clean_pages_parallel(distinct_texts)))
+        return {page_num: cleaned_texts[text] for page_num, text in raw_pages}
+    
+    def _extract_pages_parallel(self, source: Union[str, bytes]) -> Optional[Dict[int, str]]:
+        """
+        Extract and clean pages across processes, each taking runs of pages
         
-        # Fix hyphenated words at line breaks
-        text = re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)
+        Args:
+            source: PDF path or contents
+            
+        Returns:
+            Cleaned text by page number for pages with text, or None if the
+            pool failed (the caller then extracts in-process)
+        """
+        # Several runs per worker, so one slow page range doesn't hold up the rest
+        run_length = max(1, -(-self.page_count // (self.num_workers * 4)))
+        page_ranges = [(start, min(start + run_length, self.page_count))
+                       for start in range(0, self.page_count, run_length)]
         
-        # Remove excessive whitespace
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = re.sub(r' {2,}', ' ', text)
+        try:
+            with ProcessPoolExecutor(max_workers=self.num_workers, mp_context=POOL_CONTEXT,
+                                     initializer=_init_extraction_worker,
+                                     initargs=(source,)) as executor:
+                cleaned_pages = {}
+                for (start, _), texts in zip(page_ranges, executor.map(_extract_page_range, page_ranges)):
+                    for page_num, text in enumerate(texts, start + 1):
+                        if text is not None:
+                            cleaned_pages[page_num] = text
+                return cleaned_pages
+        except Exception as e:
+            logger.warning(f"Parallel extraction failed, extracting pages in-process: {e}")
+            return None
+    
+    def _clean_page_text(self, text: str, page_num: int) -> str:
+        """
+        Clean extracted text from a single page
         
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,;:!?()\[\]{}\-–—\'\"°%$€£¥+=/<>\n]', '', text)
+        Args:
+            text: Raw extracted text
+            page_num: Page number
+            
+        Returns:
+            Cleaned text
+        """
+        for pattern, replacement in PAGE_TEXT_SUBSTITUTIONS:
+            text = pattern.sub(replacement, text)
         
         return text.strip()
     
@@ -163,19 +416,19 @@ class PDFExtractor:
             return False
         
         # Check for numbered headings (1. , 1.1 , Chapter 1, etc)
-        if re.match(r'^\d+\.?\s+[A-Z]', line):
+        if NUMBERED_HEADING.match(line):
             return True
         
-        # Check for all caps headings (at least 50% caps)
-        caps_ratio = sum(1 for c in line if c.isupper()) / len(line) if line else 0
-        if caps_ratio > 0.5 and len(line) < 50:
+        # Check for all caps headings (at least 50% caps); the length test
+        # goes first so longer lines skip the per-character count
+        if line and len(line) < 50 and sum(map(str.isupper, line)) / len(line) > 0.5:
             return True
         
         # Check for title case with common heading words
-        heading_words = ['introduction', 'conclusion', 'abstract', 'summary', 
-                        'chapter', 'section', 'overview', 'background', 'method']
-        if any(word in line.lower() for word in heading_words) and len(line) < 60:
-            return True
+        if len(line) < 60:
+            line_lower = line.lower()
+            if any(word in line_lower for word in HEADING_WORDS):
+                return True
         
         return False
 
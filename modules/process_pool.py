@@ -0,0 +1,17 @@
+"""
+Worker Process Pools
+Start method shared by every module that fans work out to processes
+"""
+
+import multiprocessing
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Workers come from a forkserver (a clean single-threaded process) instead of
+# being forked from the caller: the app submits work from its worker threads,
+# and forking a threaded process can copy locks held by other threads.
+# Platforms without forkserver (Windows) spawn
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+POOL_CONTEXT = multiprocessing.get_context(POOL_START_METHOD)
@@ -4,25 +4,25 @@ Generates potential exam questions from text using rule-based templates
 """
 
 import re
-from typing import List, Dict, Tuple
+from bisect import bisect_right
+from itertools import chain
+from typing import List, Dict, Tuple, Iterable
 import random
 import logging
 
+# spaCy model shared with the other modules (None when unavailable)
+from .spacy_model import nlp, SPACY_AVAILABLE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import spacy
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-    try:
-        nlp = spacy.load('en_core_web_sm')
-    except:
-        SPACY_AVAILABLE = False
-        nlp = None
-except ImportError:
-    SPACY_AVAILABLE = False
-    nlp = None
+# Sentences spaCy parses per batch when transforming statements to questions
+SPACY_BATCH_SIZE = 64
+
+# Sentence patterns for rule-based questions ("X is Y", "X can Y", "X helps Y")
+IS_PATTERN = re.compile(r'^([A-Z][a-z\s]+)\s+is\s+(.+?)\.')
+CAN_PATTERN = re.compile(r'^([A-Z][a-z\s]+)\s+can\s+(.+?)\.')
+HELPS_PATTERN = re.compile(r'^([A-Z][a-z\s]+)\s+helps?\s+(.+?)\.')
 
 
 class QAGenerator:
@@ -83,23 +83,20 @@ class QAGenerator:
         Returns:
             List of Q&A dictionaries
         """
-        qa_pairs = []
-        
-        # Method 1: Keyword-based questions
-        keyword_questions = self._generate_keyword_questions(keywords, sentences)
-        qa_pairs.extend(keyword_questions)
-        
-        # Method 2: Pattern-based questions
-        pattern_questions = self._generate_pattern_questions(sentences)
-        qa_pairs.extend(pattern_questions)
-        
-        # Method 3: Sentence transformation questions
-        transform_questions = self._generate_transform_questions(sentences)
-        qa_pairs.extend(transform_questions)
+        # Methods run lazily in order, so later ones (the spaCy transform
+        # is the costliest) are skipped once enough unique questions exist
+        methods = (
+            # Method 1: Keyword-based questions
+            lambda: self._generate_keyword_questions(keywords, sentences),
+            # Method 2: Pattern-based questions
+            lambda: self._generate_pattern_questions(sentences),
+            # Method 3: Sentence transformation questions
+            lambda: self._generate_transform_questions(sentences),
+        )
+        candidates = chain.from_iterable(method() for method in methods)
         
         # Remove duplicates and limit
-        qa_pairs = self._deduplicate_questions(qa_pairs)
-        qa_pairs = qa_pairs[:num_questions]
+        qa_pairs = self._deduplicate_questions(candidates, limit=num_questions)
         
         logger.info(f"Generated {len(qa_pairs)} Q&A pairs")
         
@@ -109,10 +106,12 @@ class QAGenerator:
                                    sentences: List[str]) -> List[Dict[str, str]]:
         """Generate questions based on keywords"""
         questions = []
+        # Lowercase the sentences once for all keywords, not once per keyword
+        lowered_text, starts = self._build_sentence_index(sentences)
         
         for keyword, score in keywords[:10]:
             # Find sentence containing keyword
-            answer_sent = self._find_sentence_with_keyword(keyword, sentences)
+            answer_sent = self._find_sentence_with_keyword(keyword, sentences, lowered_text, starts)
             
             if answer_sent:
                 # Generate question
@@ -135,7 +134,7 @@ class QAGenerator:
         
         for sentence in sentences:
             # Pattern: "X is Y" -> "What is X?"
-            is_pattern = re.match(r'^([A-Z][a-z\s]+)\s+is\s+(.+?)\.', sentence)
+            is_pattern = IS_PATTERN.match(sentence)
             if is_pattern:
                 subject = is_pattern.group(1)
                 questions.append({
@@ -145,7 +144,7 @@ class QAGenerator:
                 })
             
             # Pattern: "X can Y" -> "What can X do?"
-            can_pattern = re.match(r'^([A-Z][a-z\s]+)\s+can\s+(.+?)\.', sentence)
+            can_pattern = CAN_PATTERN.match(sentence)
             if can_pattern:
                 subject = can_pattern.group(1)
                 questions.append({
@@ -155,7 +154,7 @@ class QAGenerator:
                 })
             
             # Pattern: "X helps Y" -> "How does X help?"
-            helps_pattern = re.match(r'^([A-Z][a-z\s]+)\s+helps?\s+(.+?)\.', sentence)
+            helps_pattern = HELPS_PATTERN.match(sentence)
             if helps_pattern:
                 subject = helps_pattern.group(1)
                 questions.append({
@@ -164,45 +163,42 @@ class QAGenerator:
                     'type': 'purpose'
                 })
             
-            # Pattern: Contains "because" -> "Why...?"
-            if 'because' in sentence.lower():
-                parts = sentence.split('because')
-                if len(parts) == 2:
-                    questions.append({
-                        'question': f"Why {parts[0].strip().lower()}?",
-                        'answer': sentence,
-                        'type': 'explanation'
-                    })
+            # Pattern: Contains "because" exactly once -> "Why...?"
+            if sentence.count('because') == 1:
+                cause = sentence.partition('because')[0]
+                questions.append({
+                    'question': f"Why {cause.strip().lower()}?",
+                    'answer': sentence,
+                    'type': 'explanation'
+                })
         
         return questions
     
     def _generate_transform_questions(self, sentences: List[str]) -> List[Dict[str, str]]:
         """Generate questions by transforming sentences"""
-        questions = []
+        # Skip very short or very long sentences
+        candidates = [sentence for sentence in sentences if 5 <= len(sentence.split()) <= 30]
         
-        for sentence in sentences:
-            # Skip very short or very long sentences
-            word_count = len(sentence.split())
-            if word_count < 5 or word_count > 30:
-                continue
-            
-            # Simple transformation: statement -> question
-            if SPACY_AVAILABLE and nlp:
-                qa = self._spacy_transform(sentence)
-                if qa:
-                    questions.append(qa)
-            else:
-                # Basic transformation without spacy
-                qa = self._basic_transform(sentence)
-                if qa:
-                    questions.append(qa)
+        # Simple transformation: statement -> question
+        if SPACY_AVAILABLE and nlp:
+            # Parse every candidate in one batched pass rather than one call each
+            try:
+                docs = list(nlp.pipe(candidates, batch_size=SPACY_BATCH_SIZE))
+            except Exception as e:
+                logger.debug(f"spaCy batch parse error, parsing sentences one by one: {str(e)}")
+                docs = [None] * len(candidates)
+            transformed = (self._spacy_transform(sentence, doc) for sentence, doc in zip(candidates, docs))
+        else:
+            # Basic transformation without spacy
+            transformed = (self._basic_transform(sentence) for sentence in candidates)
         
-        return questions
+        return [qa for qa in transformed if qa]
     
-    def _spacy_transform(self, sentence: str) -> Dict[str, str]:
-        """Use spaCy to transform sentence to question"""
+    def _spacy_transform(self, sentence: str, doc=None) -> Dict[str, str]:
+        """Use spaCy to transform sentence to question (doc: its parse, if done already)"""
         try:
-            doc = nlp(sentence)
+            if doc is None:
+                doc = nlp(sentence)
             
             # Find main verb and subject
             verb = None
@@ -242,19 +238,56 @@ class QAGenerator:
         
         return None
     
+    def _build_sentence_index(self, sentences: List[str]) -> Tuple[str, List[int]]:
+        """
+        Join the lowercased sentences for substring search
+        
+        Args:
+            sentences: List of sentences
+            
+        Returns:
+            Tuple of (lowercased sentences joined by NUL, start offset of each)
+        """
+        lowered = [sentence.lower() for sentence in sentences]
+        starts = []
+        offset = 0
+        for low in lowered:
+            starts.append(offset)
+            offset += len(low) + 1
+        return "\0".join(lowered), starts
+    
     def _find_sentence_with_keyword(self, keyword: str, 
-                                   sentences: List[str]) -> str:
-        """Find best sentence containing keyword"""
+                                   sentences: List[str],
+                                   lowered_text: str = None,
+                                   starts: List[int] = None) -> str:
+        """Find best sentence containing keyword (optionally via a prebuilt sentence index)"""
         keyword_lower = keyword.lower()
         
-        for sentence in sentences:
-            if keyword_lower in sentence.lower():
-                return sentence
+        if lowered_text is None or "\0" in keyword_lower:
+            for sentence in sentences:
+                if keyword_lower in sentence.lower():
+                    return sentence
+            return ""
         
-        return ""
+        # One C-level search; a match can't straddle the NUL separators
+        position = lowered_text.find(keyword_lower)
+        if position == -1 or not sentences:
+            return ""
+        return sentences[bisect_right(starts, position) - 1]
     
-    def _deduplicate_questions(self, qa_pairs: List[Dict[str, str]]) -> List[Dict[str, str]]:
-        """Remove duplicate questions"""
+    def _deduplicate_questions(self, qa_pairs: Iterable[Dict[str, str]],
+                               limit: int = None) -> List[Dict[str, str]]:
+        """
+        Remove duplicate questions
+        
+        Args:
+            qa_pairs: Q&A dictionaries, possibly a lazy iterable
+            limit: Keep only the first this many unique pairs (stops
+                consuming qa_pairs as soon as a positive limit is reached)
+            
+        Returns:
+            List of unique Q&A dictionaries
+        """
         seen_questions = set()
         unique_pairs = []
         
@@ -263,8 +296,10 @@ class QAGenerator:
             if q not in seen_questions and qa['answer']:
                 seen_questions.add(q)
                 unique_pairs.append(qa)
+                if len(unique_pairs) == limit:
+                    break
         
-        return unique_pairs
+        return unique_pairs if limit is None else unique_pairs[:limit]
     
     def generate_exam_questions(self, sentences: List[str],
                                keywords: List[tuple]) -> Dict[str, List[str]]:
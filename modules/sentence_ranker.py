@@ -5,15 +5,35 @@ Ranks sentences by importance using TextRank and TF-IDF
 
 import re
 import numpy as np
-import networkx as nx
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from sklearn.feature_extraction.text import (TfidfVectorizer, CountVectorizer,
+                                             TfidfTransformer, ENGLISH_STOP_WORDS)
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PageRank damping factor, iteration cap and per-node convergence tolerance
+# (networkx.pagerank defaults)
+PAGERANK_DAMPING = 0.85
+PAGERANK_MAX_ITER = 100
+PAGERANK_TOL = 1e-6
+
+# Precision of the dense sentence similarity matrix (n x n); single precision
+# halves its memory and the bytes each PageRank iteration reads
+SIMILARITY_DTYPE = np.float32
+
+# Punctuation/symbol characters, for the non-word ratio of a sentence
+NON_WORD_CHAR = re.compile(r'[^\w\s]')
+
+# Terms that boost a sentence's position score, matched as substrings of the
+# lowercased sentence in one scan
+TECHNICAL_TERMS = ('design', 'implement', 'analyze', 'evaluate', 'develop',
+                   'method', 'approach', 'technique', 'algorithm', 'system',
+                   'process', 'function', 'component', 'module', 'architecture')
+TECHNICAL_TERM_PATTERN = re.compile('|'.join(map(re.escape, TECHNICAL_TERMS)))
+
 
 class SentenceRanker:
     """Rank sentences by importance using multiple algorithms"""
@@ -36,6 +56,16 @@ class SentenceRanker:
         if not sentences:
             return []
         
+        scores = self._scores(sentences, method)
+        
+        # Create ranked list
+        ranked = [(i, scores[i], sentences[i]) for i in range(len(sentences))]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        
+        return ranked
+    
+    def _scores(self, sentences: List[str], method: str) -> np.ndarray:
+        """Score sentences with the given ranking method (see rank_sentences)"""
         if method == 'textrank':
             scores = self._textrank_scores(sentences)
         elif method == 'tfidf':
@@ -45,15 +75,24 @@ class SentenceRanker:
         else:  # combined
             scores = self._combined_scores(sentences)
         
-        # Create ranked list
-        ranked = [(i, scores[i], sentences[i]) for i in range(len(sentences))]
-        ranked.sort(key=lambda x: x[1], reverse=True)
-        
         logger.info(f"Ranked {len(sentences)} sentences using {method} method")
         
-        return ranked
+        return scores
+    
+    def _top_indices(self, scores: np.ndarray, top_n: int) -> List[int]:
+        """
+        Indices of the top_n highest scores, in original order
+        
+        Selects by partition instead of a full sort; ties at the cut-off go
+        to the earlier sentences, as the stable sort in rank_sentences does.
+        """
+        cutoff_pos = len(scores) - top_n
+        cutoff = np.partition(scores, cutoff_pos)[cutoff_pos]
+        above = np.flatnonzero(scores > cutoff)
+        ties = np.flatnonzero(scores == cutoff)[:top_n - len(above)]
+        return sorted(np.concatenate((above, ties)).tolist())
     
-    def _textrank_scores(self, sentences: List[str]) -> np.ndarray:
+    def _textrank_scores(self, sentences: List[str], term_counts=None) -> np.ndarray:
         """
         Calculate TextRank scores for sentences
         
@@ -62,39 +101,97 @@ class SentenceRanker:
         """
         try:
             # Build similarity matrix
-            similarity_matrix = self._build_similarity_matrix(sentences)
-            
-            # Convert to graph
-            nx_graph = nx.from_numpy_array(similarity_matrix)
-            
-            # Calculate PageRank scores
-            scores = nx.pagerank(nx_graph, max_iter=100)
+            similarity_matrix = self._build_similarity_matrix(sentences, term_counts)
             
-            # Convert to array
-            score_array = np.array([scores[i] for i in range(len(sentences))])
-            
-            return score_array
+            # Calculate PageRank scores on the similarity graph
+            return self._pagerank(similarity_matrix)
         except Exception as e:
             logger.error(f"TextRank error: {str(e)}")
             return np.ones(len(sentences))
     
-    def _build_similarity_matrix(self, sentences: List[str]) -> np.ndarray:
-        """Build sentence similarity matrix using TF-IDF"""
+    def _pagerank(self, similarity_matrix: np.ndarray) -> np.ndarray:
+        """
+        PageRank by NumPy power iteration over the sentence similarity graph
+        
+        Follows networkx.pagerank on the undirected graph of the matrix:
+        weighted edges, uniform teleport, dangling nodes spread uniformly and
+        an L1 convergence test, without building a graph.
+        
+        Args:
+            similarity_matrix: Square matrix of non-negative edge weights
+            
+        Returns:
+            PageRank score per sentence
+        """
+        # An undirected graph keeps one weight per pair (the lower triangle's,
+        # as from_numpy_array ends up with)
+        weights = np.tril(similarity_matrix) + np.tril(similarity_matrix, -1).T
+        n = weights.shape[0]
+        
+        # Row-stochastic transition matrix; rows without edges are dangling
+        out_weight = weights.sum(axis=1)
+        dangling = out_weight == 0
+        inverse_weight = np.zeros(n, dtype=weights.dtype)
+        inverse_weight[~dangling] = 1.0 / out_weight[~dangling]
+        transition = weights * inverse_weight[:, None]
+        
+        scores = np.full(n, 1.0 / n, dtype=weights.dtype)
+        teleport = (1 - PAGERANK_DAMPING) / n
+        for _ in range(PAGERANK_MAX_ITER):
+            previous = scores
+            scores = PAGERANK_DAMPING * (scores @ transition + scores[dangling].sum() / n) + teleport
+            if np.abs(scores - previous).sum() < n * PAGERANK_TOL:
+                return scores
+        raise RuntimeError(f"PageRank did not converge in {PAGERANK_MAX_ITER} iterations")
+    
+    def _count_terms(self, sentences: List[str]) -> Optional[Tuple[object, np.ndarray]]:
+        """
+        Tokenize the sentences once for the TF-IDF based scorers
+        
+        Args:
+            sentences: List of sentences
+            
+        Returns:
+            Tuple of (sparse term counts, vocabulary terms), or None if the
+            sentences have no terms (each scorer then falls back on its own)
+        """
         try:
-            vectorizer = TfidfVectorizer()
-            tfidf_matrix = vectorizer.fit_transform(sentences)
-            similarity_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
+            # Float counts, as TfidfVectorizer feeds its transformer
+            vectorizer = CountVectorizer(dtype=np.float64)
+            return vectorizer.fit_transform(sentences), vectorizer.get_feature_names_out()
+        except ValueError:
+            return None
+    
+    def _build_similarity_matrix(self, sentences: List[str], term_counts=None) -> np.ndarray:
+        """Build sentence similarity matrix using TF-IDF (term_counts: from _count_terms)"""
+        try:
+            if term_counts is None:
+                vectorizer = TfidfVectorizer()
+                tfidf_matrix = vectorizer.fit_transform(sentences)
+            else:
+                tfidf_matrix = TfidfTransformer().fit_transform(term_counts[0])
+            # One operand: rows are normalized once and the sparse product
+            # is taken against itself
+            similarity_matrix = cosine_similarity(tfidf_matrix.astype(SIMILARITY_DTYPE))
             
             return similarity_matrix
         except Exception as e:
             logger.error(f"Similarity matrix error: {str(e)}")
             return np.eye(len(sentences))
     
-    def _tfidf_scores(self, sentences: List[str]) -> np.ndarray:
-        """Calculate average TF-IDF score for each sentence"""
+    def _tfidf_scores(self, sentences: List[str], term_counts=None) -> np.ndarray:
+        """Calculate average TF-IDF score for each sentence (term_counts: from _count_terms)"""
         try:
-            vectorizer = TfidfVectorizer(stop_words='english')
-            tfidf_matrix = vectorizer.fit_transform(sentences)
+            if term_counts is None:
+                vectorizer = TfidfVectorizer(stop_words='english')
+                tfidf_matrix = vectorizer.fit_transform(sentences)
+            else:
+                # Dropping stop-word columns matches stop_words='english' for unigrams
+                counts, terms = term_counts
+                keep = np.array([term not in ENGLISH_STOP_WORDS for term in terms], dtype=bool)
+                if not keep.any():
+                    raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+                tfidf_matrix = TfidfTransformer().fit_transform(counts[:, keep])
             
             # Average TF-IDF score per sentence
             scores = np.asarray(tfidf_matrix.mean(axis=1)).flatten()
@@ -110,48 +207,39 @@ class SentenceRanker:
         First and last sentences often more important, but penalize low-content
         """
         n = len(sentences)
-        scores = np.zeros(n)
-        
-        for i in range(n):
-            # Base position score
-            if i < 3:
-                base_score = 1.0 - (i * 0.1)
-            elif i >= n - 2:
-                base_score = 0.8
-            else:
-                base_score = 0.5
-            
-            # Content quality multiplier
-            sentence = sentences[i]
-            word_count = len(sentence.split())
-            
-            # Penalize very short or very long sentences
-            if word_count < 8:
-                base_score *= 0.5
-            elif word_count > 60:
-                base_score *= 0.7
-            
-            # Penalize sentences with excessive numbers/symbols
-            non_word_ratio = len(re.findall(r'[^\w\s]', sentence)) / max(len(sentence), 1)
-            if non_word_ratio > 0.3:
-                base_score *= 0.6
-            
-            # Boost sentences with technical terms
-            technical_terms = ['design', 'implement', 'analyze', 'evaluate', 'develop',
-                             'method', 'approach', 'technique', 'algorithm', 'system',
-                             'process', 'function', 'component', 'module', 'architecture']
-            if any(term in sentence.lower() for term in technical_terms):
-                base_score *= 1.2
-            
-            scores[i] = min(base_score, 1.0)
         
-        return scores
+        # Per-sentence text measurements; the scoring itself is vectorized
+        word_counts = np.fromiter((len(sentence.split()) for sentence in sentences), dtype=np.int64, count=n)
+        non_word_counts = np.fromiter((len(NON_WORD_CHAR.findall(sentence)) for sentence in sentences),
+                                      dtype=np.int64, count=n)
+        lengths = np.fromiter((len(sentence) for sentence in sentences), dtype=np.int64, count=n)
+        technical = np.fromiter((TECHNICAL_TERM_PATTERN.search(sentence.lower()) is not None
+                                 for sentence in sentences), dtype=bool, count=n)
+        
+        # Base position score
+        positions = np.arange(n)
+        scores = np.where(positions < 3, 1.0 - positions * 0.1,
+                          np.where(positions >= n - 2, 0.8, 0.5))
+        
+        # Penalize very short or very long sentences
+        scores *= np.where(word_counts < 8, 0.5, np.where(word_counts > 60, 0.7, 1.0))
+        
+        # Penalize sentences with excessive numbers/symbols
+        non_word_ratio = non_word_counts / np.maximum(lengths, 1)
+        scores *= np.where(non_word_ratio > 0.3, 0.6, 1.0)
+        
+        # Boost sentences with technical terms
+        scores *= np.where(technical, 1.2, 1.0)
+        
+        return np.minimum(scores, 1.0)
     
     def _combined_scores(self, sentences: List[str]) -> np.ndarray:
         """Combine multiple scoring methods"""
         # Get scores from each method
-        textrank = self._textrank_scores(sentences)
-        tfidf = self._tfidf_scores(sentences)
+        # Both TF-IDF based methods share one tokenization pass
+        term_counts = self._count_terms(sentences)
+        textrank = self._textrank_scores(sentences, term_counts)
+        tfidf = self._tfidf_scores(sentences, term_counts)
         position = self._position_scores(sentences)
         
         # Normalize scores to 0-1 range
@@ -166,22 +254,28 @@ class SentenceRanker:
             'position': 0.2
         }
         
-        combined = (textrank * weights['textrank'] + 
-                   tfidf * weights['tfidf'] + 
-                   position * weights['position'])
+        # Accumulate in place into the float64 TF-IDF term (addition order
+        # doesn't change the sums)
+        combined = tfidf * weights['tfidf']
+        combined += textrank * weights['textrank']
+        combined += position * weights['position']
         
         return combined
     
     def _normalize(self, scores: np.ndarray) -> np.ndarray:
         """Normalize scores to 0-1 range"""
-        if scores.max() == scores.min():
+        low, high = scores.min(), scores.max()
+        if high == low:
             return np.ones_like(scores)
-        return (scores - scores.min()) / (scores.max() - scores.min())
+        normalized = scores - low
+        normalized /= high - low
+        return normalized
     
     def get_top_sentences(self, sentences: List[str], 
                          top_n: int = None, 
                          top_percent: float = 0.3,
-                         method: str = 'combined') -> List[str]:
+                         method: str = 'combined',
+                         ranked: List[Tuple[int, float, str]] = None) -> List[str]:
         """
         Get top N most important sentences
         
@@ -190,6 +284,8 @@ class SentenceRanker:
             top_n: Number of sentences to return (overrides top_percent)
             top_percent: Percentage of sentences to return (default 30%)
             method: Ranking method to use
+            ranked: rank_sentences() output for these sentences, to select
+                several sizes from one ranking (method is then unused)
             
         Returns:
             List of top sentences in original order
@@ -197,13 +293,22 @@ class SentenceRanker:
         if not sentences:
             return []
         
-        # Rank sentences
-        ranked = self.rank_sentences(sentences, method)
-        
         # Determine how many to select
         if top_n is None:
             top_n = max(3, int(len(sentences) * top_percent))
         
+        if ranked is None:
+            # Keeping every sentence doesn't depend on the scores (e.g. short
+            # sections), so skip scoring altogether
+            if top_n >= len(sentences):
+                return list(sentences)
+            scores = self._scores(sentences, method)
+            # Partial selection when only some sentences are kept
+            if 0 < top_n < len(sentences) and not np.isnan(scores).any():
+                return [sentences[i] for i in self._top_indices(scores, top_n)]
+            ranked = [(i, scores[i], sentences[i]) for i in range(len(sentences))]
+            ranked.sort(key=lambda x: x[1], reverse=True)
+        
         # Get top N sentence indices
         top_indices = [idx for idx, score, sent in ranked[:top_n]]
         top_indices.sort()  # Keep original order
@@ -224,11 +329,13 @@ class SentenceRanker:
             Array of keyword-based scores
         """
         scores = np.zeros(len(sentences))
+        # Lowercase the keywords once rather than once per sentence
+        keywords_lower = [kw.lower() for kw in keywords]
         
         for i, sentence in enumerate(sentences):
             sentence_lower = sentence.lower()
             # Count keyword occurrences
-            keyword_count = sum(1 for kw in keywords if kw.lower() in sentence_lower)
+            keyword_count = sum(kw in sentence_lower for kw in keywords_lower)
             scores[i] = keyword_count
         
         return self._normalize(scores)
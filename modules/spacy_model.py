@@ -0,0 +1,27 @@
+"""
+Shared spaCy Model
+Loads en_core_web_sm once for every module that uses it
+"""
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pipes no module reads (no entities are used); excluded pipes are never
+# loaded, unlike disabled ones
+SPACY_EXCLUDE = ['ner']
+
+# Try to import spacy, but make it optional
+try:
+    import spacy
+    try:
+        nlp = spacy.load('en_core_web_sm', exclude=SPACY_EXCLUDE)
+    except:
+        logger.warning("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
+        nlp = None
+except ImportError:
+    logger.warning("spaCy not installed. Some features will be limited.")
+    nlp = None
+
+SPACY_AVAILABLE = nlp is not None
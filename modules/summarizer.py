@@ -3,8 +3,9 @@ Summarization Module
 Generates extractive summaries using ranked sentences
 """
 
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from .sentence_ranker import SentenceRanker
+from .text_preprocessor import TextPreprocessor
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -16,11 +17,13 @@ class Summarizer:
     
     def __init__(self):
         self.ranker = SentenceRanker()
+        self.preprocessor = TextPreprocessor()
     
     def generate_summary(self, sentences: List[str], 
                         summary_ratio: float = 0.7,
                         min_sentences: int = 20,
-                        max_sentences: int = None) -> Dict[str, any]:
+                        max_sentences: int = None,
+                        ranked: List[Tuple[int, float, str]] = None) -> Dict[str, any]:
         """
         Generate comprehensive extractive summary (like ChatGPT study notes)
         
@@ -29,6 +32,8 @@ class Summarizer:
             summary_ratio: Ratio of sentences to include (0-1) - default 70%
             min_sentences: Minimum number of sentences
             max_sentences: Maximum number of sentences (None for no limit)
+            ranked: Combined rank_sentences() output for these sentences, if
+                already computed
             
         Returns:
             Dictionary with summary text and metadata
@@ -47,7 +52,8 @@ class Summarizer:
         summary_sentences = self.ranker.get_top_sentences(
             sentences, 
             top_n=target_count,
-            method='combined'
+            method='combined',
+            ranked=ranked
         )
         
         # Combine into paragraph
@@ -65,13 +71,16 @@ class Summarizer:
         }
     
     def generate_key_points(self, sentences: List[str], 
-                           top_n: int = 50) -> List[str]:
+                           top_n: int = 50,
+                           ranked: List[Tuple[int, float, str]] = None) -> List[str]:
         """
         Generate comprehensive key points (bullet format) - like study notes
         
         Args:
             sentences: List of sentences
             top_n: Number of key points (default 50 for comprehensive coverage)
+            ranked: Combined rank_sentences() output for these sentences, if
+                already computed
             
         Returns:
             List of key point sentences
@@ -87,7 +96,8 @@ class Summarizer:
         key_sentences = self.ranker.get_top_sentences(
             sentences,
             top_n=min(adaptive_n, len(sentences)),
-            method='combined'
+            method='combined',
+            ranked=ranked
         )
         
         logger.info(f"Generated {len(key_sentences)} comprehensive key points")
@@ -115,10 +125,11 @@ class Summarizer:
         # Comprehensive: 75% of sentences (min 50, no max)
         detailed_count = max(50, int(total * 0.75))
         
-        # Generate each level
-        brief = self.ranker.get_top_sentences(sentences, top_n=brief_count)
-        medium = self.ranker.get_top_sentences(sentences, top_n=medium_count)
-        detailed = self.ranker.get_top_sentences(sentences, top_n=detailed_count)
+        # Generate each level from a single ranking
+        ranked = self.ranker.rank_sentences(sentences) if sentences else []
+        brief = self.ranker.get_top_sentences(sentences, top_n=brief_count, ranked=ranked)
+        medium = self.ranker.get_top_sentences(sentences, top_n=medium_count, ranked=ranked)
+        detailed = self.ranker.get_top_sentences(sentences, top_n=detailed_count, ranked=ranked)
         
         return {
             'brief': {
@@ -157,9 +168,7 @@ class Summarizer:
             content = section.get('content', '')
             
             # Split into sentences
-            from .text_preprocessor import TextPreprocessor
-            preprocessor = TextPreprocessor()
-            sentences = preprocessor.tokenize_sentences(content)
+            sentences = self.preprocessor.tokenize_sentences(content)
             
             if not sentences:
                 continue
@@ -3,18 +3,30 @@ Text Preprocessing Module
 Cleans, tokenizes, and prepares text for NLP processing
 """
 
+import os
 import re
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import NLTKWordTokenizer
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import string
-from typing import List, Dict
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
 import logging
+from .process_pool import POOL_CONTEXT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try to import pyahocorasick for multi-pattern substring matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    logger.warning("pyahocorasick not installed. Institutional text will be matched with a regex. Install with: pip install pyahocorasick")
+    AHOCORASICK_AVAILABLE = False
+
 # Download required NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
@@ -36,25 +48,124 @@ try:
 except LookupError:
     nltk.download('punkt_tab', quiet=True)
 
+# Sentences that are only digits, spaces and dots (page numbers, list markers)
+NUMERIC_ONLY = re.compile(r'^[\d\s.]+$')
+DIGIT = re.compile(r'\d')
+
+# Repetitive institutional text (lab manual headers, rubric tables), matched
+# in one scan of the lowercased sentence
+INSTITUTIONAL_PHRASES = (
+    'rv college of engineering',
+    'department of electronics',
+    'laboratory manual',
+    'observation book',
+    'autonomous institution',
+    'analysis and design of digital circuits with hdl',
+    'criteria max marks marks obtained',
+    'problem statement design specifications',
+    'simulation conduction of the experiment',
+)
+INSTITUTIONAL_TEXT = re.compile('|'.join(map(re.escape, INSTITUTIONAL_PHRASES)))
+if AHOCORASICK_AVAILABLE:
+    # One automaton scan finds any of the phrases without trying each at every position
+    INSTITUTIONAL_AUTOMATON = ahocorasick.Automaton()
+    for _phrase in INSTITUTIONAL_PHRASES:
+        INSTITUTIONAL_AUTOMATON.add_word(_phrase, _phrase)
+    INSTITUTIONAL_AUTOMATON.make_automaton()
+
+
+def _has_institutional_text(s_lower: str) -> bool:
+    """Whether a lowercased sentence contains any of INSTITUTIONAL_PHRASES"""
+    if AHOCORASICK_AVAILABLE:
+        return next(INSTITUTIONAL_AUTOMATON.iter(s_lower), None) is not None
+    return INSTITUTIONAL_TEXT.search(s_lower) is not None
+
+# Lemmatizer shared by every preprocessor (WordNet loads lazily on first use)
+LEMMATIZER = WordNetLemmatizer()
+
+# Distinct words whose lemmas are remembered across documents
+LEMMA_CACHE_SIZE = 200_000
+
+# Word tokenizer behind nltk's word_tokenize (its patterns compile once, on the class)
+WORD_TOKENIZER = NLTKWordTokenizer()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_stop_words(language: str) -> frozenset:
+    """Read a language's NLTK stop word list once per process"""
+    return frozenset(stopwords.words(language))
+
+
+@functools.lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _lemmatize(word: str) -> str:
+    """Lemma of a word; repeated words skip the WordNet lookup"""
+    return LEMMATIZER.lemmatize(word)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_sentence_tokenizer(language: str):
+    """Load a language's pretrained Punkt tokenizer once per process"""
+    try:
+        from nltk.tokenize import PunktTokenizer  # nltk >= 3.8.2 (punkt_tab)
+    except ImportError:
+        return nltk.data.load(f'tokenizers/punkt/{language}.pickle')
+    return PunktTokenizer(language)
+
+
+# Deletes ASCII punctuation from a word
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+# Whitespace before punctuation, e.g. "word ." -> "word."
+SPACE_BEFORE_PUNCT = re.compile(r'\s+(?=[.,;:!?])')
+
+# Citations: numeric ([1], [2,3]) and author-year ((Smith et al., 2020))
+NUMERIC_CITATION = re.compile(r'\[\d+(?:,\s*\d+)*\]')
+AUTHOR_YEAR_CITATION = re.compile(r'\([A-Z][a-z]+(?:\s+et\s+al\.)?,?\s+\d{4}\)')
+
+# Fewer texts are preprocessed in-process: starting worker processes costs
+# more than it saves
+PARALLEL_MIN_TEXTS = 4
+MAX_PREPROCESS_WORKERS = 4
+
+# Preprocessor of a worker process, set by its initializer
+_worker_preprocessor = None
+
+
+def _init_preprocess_worker(language: str):
+    """Give a preprocessing worker process its own preprocessor"""
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(language)
+
+
+def _preprocess_in_worker(args: tuple) -> Dict[str, any]:
+    """Preprocess one (text, remove_stopwords, include_words) in a pool worker"""
+    return _worker_preprocessor.preprocess(*args)
+
 
 class TextPreprocessor:
     """Preprocess and clean text for NLP tasks"""
     
     def __init__(self, language='english'):
         self.language = language
-        self.stop_words = set(stopwords.words(language))
-        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words = _load_stop_words(language)
+        self.lemmatizer = LEMMATIZER
+        self.sentence_tokenizer = _load_sentence_tokenizer(language)
         
-    def preprocess(self, text: str, remove_stopwords: bool = False) -> Dict[str, any]:
+    def preprocess(self, text: str, remove_stopwords: bool = False,
+                   include_words: bool = True) -> Dict[str, any]:
         """
         Complete preprocessing pipeline
         
         Args:
             text: Input text
             remove_stopwords: Whether to remove stopwords
+            include_words: Whether to word-tokenize the text; word tokenization
+                re-runs sentence splitting over the whole text, so callers
+                that only need sentences should pass False
             
         Returns:
-            Dictionary with processed components
+            Dictionary with processed components ('words' and 'word_count'
+            only when include_words is set)
         """
         # Sentence tokenization
         sentences = self.tokenize_sentences(text)
@@ -62,6 +173,16 @@ class TextPreprocessor:
         # Clean sentences
         cleaned_sentences = [self.clean_sentence(s) for s in sentences]
         
+        result = {
+            'sentences': cleaned_sentences,
+            'sentence_count': len(sentences),
+            'original_text': text
+        }
+        
+        if not include_words:
+            logger.info(f"Preprocessed {len(sentences)} sentences")
+            return result
+        
         # Word tokenization
         words = self.tokenize_words(text)
         
@@ -70,13 +191,42 @@ class TextPreprocessor:
         
         logger.info(f"Preprocessed {len(sentences)} sentences, {len(cleaned_words)} words")
         
-        return {
-            'sentences': cleaned_sentences,
-            'words': cleaned_words,
-            'sentence_count': len(sentences),
-            'word_count': len(cleaned_words),
-            'original_text': text
-        }
+        result['words'] = cleaned_words
+        result['word_count'] = len(cleaned_words)
+        return result
+    
+    def preprocess_many(self, texts: List[str], remove_stopwords: bool = False,
+                        include_words: bool = True,
+                        num_workers: Optional[int] = None) -> List[Dict[str, any]]:
+        """
+        Run preprocess over many documents, using a process pool when there are several
+        
+        Args:
+            texts: Text of each document
+            remove_stopwords: Whether to remove stopwords
+            include_words: Whether to word-tokenize the texts (see preprocess)
+            num_workers: Number of worker processes (defaults to CPU count, capped at 4)
+            
+        Returns:
+            Result of preprocess for each text, in the same order
+        """
+        if num_workers is None:
+            num_workers = min(os.cpu_count() or 1, MAX_PREPROCESS_WORKERS)
+        
+        if num_workers <= 1 or len(texts) < PARALLEL_MIN_TEXTS:
+            return [self.preprocess(text, remove_stopwords, include_words) for text in texts]
+        
+        chunksize = max(1, len(texts) // (num_workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=POOL_CONTEXT,
+                                     initializer=_init_preprocess_worker,
+                                     initargs=(self.language,)) as executor:
+                return list(executor.map(_preprocess_in_worker,
+                                         [(text, remove_stopwords, include_words) for text in texts],
+                                         chunksize=chunksize))
+        except Exception as e:
+            logger.warning(f"Parallel preprocessing failed, preprocessing texts sequentially: {e}")
+            return [self.preprocess(text, remove_stopwords, include_words) for text in texts]
     
     def tokenize_sentences(self, text: str) -> List[str]:
         """
@@ -88,11 +238,12 @@ class TextPreprocessor:
         Returns:
             List of sentences
         """
-        sentences = sent_tokenize(text)
+        sentences = self.sentence_tokenizer.tokenize(text)
         
         # Filter out noise patterns
-        filtered_sentences = []
-        seen_sentences = set()  # Track duplicates
+        # Lowercased sentence -> its first occurrence; insertion order keeps
+        # the document order (dedupes with a hash lookup per sentence)
+        filtered_sentences = {}
         
         for s in sentences:
             s = s.strip()
@@ -102,33 +253,23 @@ class TextPreprocessor:
             if word_count < 5 or word_count > 150:  # Increased max to 150
                 continue
             
-            # Skip repetitive institutional text
-            if any(pattern in s.lower() for pattern in [
-                'rv college of engineering',
-                'department of electronics',
-                'laboratory manual',
-                'observation book',
-                'autonomous institution',
-                'analysis and design of digital circuits with hdl',
-                'criteria max marks marks obtained',
-                'problem statement design specifications',
-                'simulation conduction of the experiment'
-            ]):
+            # Skip duplicates (case-insensitive); checked before the pattern
+            # filters since a repeat is dropped either way
+            s_lower = s.lower()
+            if s_lower in filtered_sentences:
                 continue
             
-            # Skip sentences that are mostly page numbers or formatting
-            if re.match(r'^[\d\s.]+$', s) or len(re.findall(r'\d', s)) / max(len(s), 1) > 0.5:
+            # Skip repetitive institutional text
+            if _has_institutional_text(s_lower):
                 continue
             
-            # Skip duplicates (case-insensitive)
-            s_lower = s.lower()
-            if s_lower in seen_sentences:
+            # Skip sentences that are mostly page numbers or formatting
+            if NUMERIC_ONLY.match(s) or len(DIGIT.findall(s)) / max(len(s), 1) > 0.5:
                 continue
             
-            seen_sentences.add(s_lower)
-            filtered_sentences.append(s)
+            filtered_sentences[s_lower] = s
         
-        return filtered_sentences
+        return list(filtered_sentences.values())
     
     def tokenize_words(self, text: str) -> List[str]:
         """
@@ -140,7 +281,9 @@ class TextPreprocessor:
         Returns:
             List of words
         """
-        return word_tokenize(text.lower())
+        # Same as word_tokenize: split sentences, then tokenize each one
+        return [token for sentence in self.sentence_tokenizer.tokenize(text.lower())
+                for token in WORD_TOKENIZER.tokenize(sentence)]
     
     def clean_sentence(self, sentence: str) -> str:
         """
@@ -152,17 +295,15 @@ class TextPreprocessor:
         Returns:
             Cleaned sentence
         """
-        # Remove extra whitespace
-        sentence = ' '.join(sentence.split())
-        
-        # Fix common punctuation issues
-        sentence = re.sub(r'\s+([.,;:!?])', r'\1', sentence)
+        # Fix common punctuation issues, then remove extra whitespace (the
+        # split also strips the ends)
+        sentence = ' '.join(SPACE_BEFORE_PUNCT.sub('', sentence).split())
         
         # Ensure sentence ends with punctuation
         if sentence and sentence[-1] not in '.!?':
             sentence += '.'
         
-        return sentence.strip()
+        return sentence
     
     def clean_words(self, words: List[str], remove_stopwords: bool = False) -> List[str]:
         """
@@ -175,23 +316,16 @@ class TextPreprocessor:
         Returns:
             Cleaned word list
         """
-        cleaned = []
+        # Remove punctuation
+        stripped = (word.translate(PUNCTUATION_TABLE) for word in words)
         
-        for word in words:
-            # Remove punctuation
-            word = word.translate(str.maketrans('', '', string.punctuation))
-            
-            # Skip empty, very short, or purely numeric
-            if len(word) <= 2 or word.isdigit():
-                continue
-            
-            # Remove stopwords if requested
-            if remove_stopwords and word.lower() in self.stop_words:
-                continue
-            
-            cleaned.append(word.lower())
+        # Skip empty, very short, or purely numeric; lowercase the rest once
+        lowered = (word.lower() for word in stripped if len(word) > 2 and not word.isdigit())
         
-        return cleaned
+        # Remove stopwords if requested
+        if remove_stopwords:
+            return [word for word in lowered if word not in self.stop_words]
+        return list(lowered)
     
     def lemmatize_words(self, words: List[str]) -> List[str]:
         """
@@ -203,7 +337,7 @@ class TextPreprocessor:
         Returns:
             Lemmatized words
         """
-        return [self.lemmatizer.lemmatize(word) for word in words]
+        return list(map(_lemmatize, words))
     
     def get_sentence_lengths(self, sentences: List[str]) -> List[int]:
         """Get word count for each sentence"""
@@ -228,10 +362,10 @@ class TextPreprocessor:
     def remove_citations(self, text: str) -> str:
         """Remove common citation patterns"""
         # Remove [1], [2,3], etc.
-        text = re.sub(r'\[\d+(?:,\s*\d+)*\]', '', text)
+        text = NUMERIC_CITATION.sub('', text)
         
         # Remove (Author, Year) patterns
-        text = re.sub(r'\([A-Z][a-z]+(?:\s+et\s+al\.)?,?\s+\d{4}\)', '', text)
+        text = AUTHOR_YEAR_CITATION.sub('', text)
         
         return text
 
@@ -0,0 +1,10 @@
+"""
+Test configuration: make the modules package importable from the repo root
+"""
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
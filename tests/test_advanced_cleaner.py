@@ -0,0 +1,57 @@
+"""
+Tests for AdvancedTextCleaner.clean_concatenated_text against the original
+rule-by-rule implementation
+"""
+
+import random
+import re
+
+import pytest
+
+from modules.advanced_cleaner import AdvancedTextCleaner
+
+
+def _baseline_clean_concatenated_text(text: str) -> str:
+    """The original sequence of substitutions, one re.sub per rule"""
+    if not text:
+        return ""
+    text = re.sub(r'\b(\w+)\s+(in|at|on|ed|er|ly|en)\s+g\b', r'\1\2g', text)
+    text = re.sub(r'\b(\w+)\s+at\s+ion\b', r'\1ation', text)
+    text = re.sub(r'\b(\w+)\s+on\s+s\b', r'\1ons', text)
+    text = re.sub(r'\bc\s+on\s+', r'con', text)
+    text = re.sub(r'\bin\s+for\s+m', r'inform', text)
+    text = re.sub(r'\bto\s+(r|s|w)\b', r'tor', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'([a-z])(\d)', r'\1 \2', text)
+    text = re.sub(r'(\d)([a-zA-Z])', r'\1 \2', text)
+    text = re.sub(r'([a-z])([A-Z][a-z])', r'\1 \2', text)
+    for prep in ['of', 'to', 'in', 'on', 'at', 'by', 'for', 'from', 'with', 'the', 'and']:
+        text = re.sub(rf'([a-z])({prep})([a-z])', r'\1 \2 \3', text, flags=re.IGNORECASE)
+    text = re.sub(r'([a-z])([A-Z][a-z]{2,})', r'\1. \2', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text
+
+
+@pytest.fixture(scope='module')
+def cleaner():
+    return AdvancedTextCleaner()
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("goes outofthe circuit", "goes out of the circuit"),
+    ("Thestateofthe register", "Thest at e of the register"),
+    ("foodofthe dataVisualization page1 1page", "food of the d at a Visualiz at ion page 1 1 page"),
+])
+def test_known_outputs(cleaner, text, expected):
+    assert cleaner.clean_concatenated_text(text) == expected
+    assert _baseline_clean_concatenated_text(text) == expected
+
+
+def test_matches_baseline_on_random_text(cleaner):
+    rng = random.Random(0)
+    pieces = ['of', 'to', 'in', 'on', 'at', 'by', 'for', 'from', 'with', 'the', 'and',
+              'out', 'state', 'circuit', 'Data', 'ion', 'g', 's', 'c', 'm', 'r', 'w',
+              'X', '1', '42', ' ', '  ', '\n', '.', 'e', 'Vis']
+    for _ in range(20000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert cleaner.clean_concatenated_text(text) == _baseline_clean_concatenated_text(text), text
@@ -0,0 +1,110 @@
+"""
+Tests for ContentDeduplicator: every deduplicate_list path against a plain
+pairwise scan over calculate_similarity
+"""
+
+import random
+
+import pytest
+
+from modules import deduplicator
+from modules.deduplicator import ContentDeduplicator
+
+WORDS = ("the output of flip flop changes state on rising edge clock signal counter "
+         "increments by one each cycle until it reaches maximum value register stores "
+         "data bits shifted left right multiplexer selects input line decoder enables").split()
+
+
+def _near_duplicates(seed: int, count: int = 120):
+    """Random sentences, each followed by copies with a few characters changed"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 25)))
+        texts.append(sentence)
+        for _ in range(rng.randint(0, 2)):
+            chars = list(sentence)
+            for i in rng.sample(range(len(chars)), max(1, len(chars) // rng.choice((8, 15, 25)))):
+                chars[i] = rng.choice('abcdefghijklmnopqrstuvwxyz ')
+            texts.append(''.join(chars))
+    rng.shuffle(texts)
+    return texts
+
+
+def _exact_scan(dedup: ContentDeduplicator, texts):
+    """deduplicate_list as a direct pairwise comparison with every kept text"""
+    unique_texts = []
+    seen_normalized = set()
+    for text in texts:
+        if not text or len(text.strip()) < 10:
+            continue
+        normalized = dedup._normalize_text(text)
+        if normalized in seen_normalized:
+            continue
+        if any(dedup.calculate_similarity(text, unique) >= dedup.similarity_threshold
+               for unique in unique_texts):
+            continue
+        unique_texts.append(text)
+        seen_normalized.add(normalized)
+    return unique_texts
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_deduplicate_list_matches_exact_scan(seed):
+    dedup = ContentDeduplicator(similarity_threshold=0.85)
+    texts = _near_duplicates(seed)
+    assert dedup.deduplicate_list(texts) == _exact_scan(dedup, texts)
+
+
+def test_lsh_not_used_with_rapidfuzz():
+    pytest.importorskip('datasketch')
+    pytest.importorskip('rapidfuzz')
+    dedup = ContentDeduplicator(similarity_threshold=0.85, use_lsh=True)
+    texts = _near_duplicates(9, count=deduplicator.LSH_MIN_TEXTS)
+    assert dedup.deduplicate_list(texts) == _exact_scan(dedup, texts)
+
+
+def test_length_band_scan_matches_exact_scan(monkeypatch):
+    monkeypatch.setattr(deduplicator, 'RAPIDFUZZ_AVAILABLE', False)
+    dedup = ContentDeduplicator(similarity_threshold=0.85)
+    texts = _near_duplicates(7)
+    assert dedup.deduplicate_list(texts) == _exact_scan(dedup, texts)
+
+
+def test_limit_is_prefix_of_full_result():
+    dedup = ContentDeduplicator(similarity_threshold=0.85)
+    texts = _near_duplicates(11)
+    assert dedup.deduplicate_list(texts, limit=20) == dedup.deduplicate_list(texts)[:20]
+
+
+def test_lsh_short_list_matches_exact_scan(monkeypatch):
+    pytest.importorskip('datasketch')
+    monkeypatch.setattr(deduplicator, 'RAPIDFUZZ_AVAILABLE', False)
+    dedup = ContentDeduplicator(similarity_threshold=0.85, use_lsh=True)
+    texts = _near_duplicates(5)
+    assert len(texts) < deduplicator.LSH_MIN_TEXTS
+    assert dedup.deduplicate_list(texts) == _exact_scan(dedup, texts)
+
+
+def test_lsh_only_drops_true_duplicates(monkeypatch):
+    pytest.importorskip('datasketch')
+    monkeypatch.setattr(deduplicator, 'RAPIDFUZZ_AVAILABLE', False)
+    monkeypatch.setattr(deduplicator, 'LSH_MIN_TEXTS', 0)
+    dedup = ContentDeduplicator(similarity_threshold=0.85, use_lsh=True)
+    texts = _near_duplicates(3)
+    
+    kept = dedup.deduplicate_list(texts)
+    exact = _exact_scan(dedup, texts)
+    
+    # LSH can miss candidates (keeping extra texts) but never drops a text
+    # that has no similar kept text before it
+    assert len(kept) >= len(exact)
+    kept_set = set(kept)
+    earlier = []
+    for text in texts:
+        if text in kept_set:
+            earlier.append(text)
+        elif len(text.strip()) >= 10:
+            assert any(dedup._normalize_text(text) == dedup._normalize_text(other)
+                       or dedup.calculate_similarity(text, other) >= dedup.similarity_threshold
+                       for other in earlier)
@@ -0,0 +1,82 @@
+"""
+Tests for IntelligentExtractor sentence classification against the original
+per-pattern checks
+"""
+
+import random
+import re
+
+import pytest
+
+from modules import intelligent_extractor
+from modules.intelligent_extractor import IntelligentExtractor
+
+BASELINE_PATTERNS = {
+    'definition': [r'\b(is|are|refers? to|means?|defined as|known as)\b',
+                   r'\b(definition|defined)\b',
+                   r'^[A-Z][a-z]+:',
+                   r'\b(called|termed)\b'],
+    'procedure': [r'^\d+\.',
+                  r'\b(step|first|second|then|next|finally|procedure)\b',
+                  r'\b(method|process|technique)\b',
+                  r'\b(should|must|need to|have to)\b'],
+    'concept': [r'\b(principle|theory|concept|idea|approach)\b',
+                r'\b(because|therefore|thus|hence|since)\b',
+                r'\b(allows?|enables?|provides?|ensures?)\b',
+                r'\b(advantage|benefit|importance|significance)\b'],
+}
+
+
+def _baseline_kind(sent: str):
+    """First category whose original patterns match, in priority order"""
+    for kind, patterns in BASELINE_PATTERNS.items():
+        if any(re.search(pattern, sent, re.IGNORECASE) for pattern in patterns):
+            return kind
+    return None
+
+
+def _sentences(seed: int, count: int = 5000):
+    rng = random.Random(seed)
+    pieces = ['Q:', 'A:', 'Term:', 'Xy:', 'x', '1.', '12.', 'is', 'island', 'Means', 'step',
+              'steps', 'Called', 'thus', 'provides', 'idea', 'output', 'clock', 'flip flop',
+              'need to', 'need', 'to', 'refer to', 'Refers to', ':', ' ', 'since', 'hence,']
+    for _ in range(count):
+        yield ' '.join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+
+
+@pytest.fixture(scope='module')
+def extractor():
+    return IntelligentExtractor()
+
+
+@pytest.mark.parametrize('sent, is_definition', [
+    ("Q: flip flop output toggles", False),
+    ("A: output goes high when clock rises", False),
+    ("Latch: a level sensitive storage element", True),
+    ("Xy: two letters before the colon", True),
+])
+def test_term_colon_definitions(extractor, sent, is_definition):
+    assert extractor._is_definition(sent) is is_definition
+
+
+def test_is_checks_match_baseline(extractor):
+    for sent in _sentences(0):
+        assert extractor._is_definition(sent) == any(
+            re.search(p, sent, re.IGNORECASE) for p in BASELINE_PATTERNS['definition']), sent
+        assert extractor._is_procedure(sent) == any(
+            re.search(p, sent, re.IGNORECASE) for p in BASELINE_PATTERNS['procedure']), sent
+        assert extractor._is_concept(sent) == any(
+            re.search(p, sent, re.IGNORECASE) for p in BASELINE_PATTERNS['concept']), sent
+
+
+@pytest.mark.parametrize('use_hyperscan', [False, True])
+def test_classify_matches_baseline(extractor, monkeypatch, use_hyperscan):
+    if use_hyperscan:
+        if intelligent_extractor.CLASSIFIER_DB is None:
+            pytest.skip('hyperscan not available')
+    else:
+        monkeypatch.setattr(intelligent_extractor, 'CLASSIFIER_DB', None)
+    for sent in _sentences(1):
+        kind = _baseline_kind(sent)
+        if kind is not None:
+            assert extractor._classify(sent) == kind, sent
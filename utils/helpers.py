@@ -8,6 +8,16 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
+# orjson serializes in Rust; falls back to the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Units for get_file_size, each 1024 times the previous
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
 
 def ensure_directory(path: str) -> Path:
     """
@@ -20,7 +30,10 @@ def ensure_directory(path: str) -> Path:
         Path object
     """
     dir_path = Path(path)
-    dir_path.mkdir(parents=True, exist_ok=True)
+    # An existing directory (the usual case) costs one stat rather than a
+    # failed mkdir plus the exception handling
+    if not os.path.isdir(path):
+        dir_path.mkdir(parents=True, exist_ok=True)
     return dir_path
 
 
@@ -36,12 +49,9 @@ def get_file_size(file_path: str) -> str:
     """
     size_bytes = os.path.getsize(file_path)
     
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024.0
-    
-    return f"{size_bytes:.2f} TB"
+    # Each unit is a factor of 2**10, so the bit length picks it directly
+    unit = min((size_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1) if size_bytes else 0
+    return f"{size_bytes / (1 << (10 * unit)):.2f} {SIZE_UNITS[unit]}"
 
 
 def format_timestamp(timestamp: datetime = None, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
@@ -69,6 +79,13 @@ def save_json(data: Dict[str, Any], file_path: str, indent: int = 2):
         file_path: Output file path
         indent: JSON indentation
     """
+    # orjson only indents by two spaces; other indents keep the json module
+    if ORJSON_AVAILABLE and indent == 2:
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                                 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    
     with open(file_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=indent, ensure_ascii=False)
 
@@ -83,6 +100,10 @@ def load_json(file_path: str) -> Dict[str, Any]:
     Returns:
         Loaded dictionary
     """
+    if ORJSON_AVAILABLE:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 